@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from models.chat import ChatRequest
 from services.rag_service import rag_service
 
@@ -7,7 +8,7 @@ router = APIRouter()
 @router.get("/chat/models")
 async def get_models():
     """List available models for chat"""
-    models = rag_service.list_models()
+    models = await run_in_threadpool(rag_service.list_models)
     return {"models": models}
 
 @router.post("/chat")
@@ -16,7 +17,10 @@ async def chat_endpoint(request: ChatRequest):
     Chat with a translated document using RAG (Ollama + Qdrant).
     """
     try:
-        response = rag_service.chat_with_document(request.doc_id, request.query, request.model)
+        # Blocking LLM/Qdrant round-trips run off the event loop so concurrent chats overlap
+        response = await run_in_threadpool(
+            rag_service.chat_with_document, request.doc_id, request.query, request.model
+        )
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from services.ocr_service import extract_arabic_text
 from services.translate_service import translate_to_english
 from utils.validators import validate_pdf
 from utils.file_utils import temporary_file
+from utils.pdf_lock import run_with_pdf_lock
 
 router = APIRouter()
 
@@ -21,8 +23,9 @@ async def process_pdf(file: UploadFile = File(...)):
         
         # Use context manager for temp file handling
         with temporary_file(content, suffix='.pdf') as tmp_file_path:
-            # Extract Arabic text using OCR
-            arabic_text = extract_arabic_text(tmp_file_path)
+            # Extract Arabic text using OCR (blocking work runs off the event loop,
+            # serialized with the other endpoints' PyMuPDF work)
+            arabic_text = await run_in_threadpool(run_with_pdf_lock, extract_arabic_text, tmp_file_path)
             
             if not arabic_text or not arabic_text.strip():
                 raise HTTPException(
@@ -31,7 +34,7 @@ async def process_pdf(file: UploadFile = File(...)):
                 )
             
             # Translate to English
-            english_text = translate_to_english(arabic_text)
+            english_text = await run_in_threadpool(translate_to_english, arabic_text)
             
             return JSONResponse(
                 status_code=200,
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 import uuid
 import os
 import time
@@ -10,6 +11,7 @@ from services.rag_service import rag_service
 import pandas as pd
 from utils.validators import validate_pdf
 from utils.file_utils import save_content_to_temp, cleanup_file
+from utils.pdf_lock import run_with_pdf_lock
 
 router = APIRouter()
 
@@ -46,7 +48,7 @@ async def translate_pdf_endpoint(background_tasks: BackgroundTasks, file: Upload
         # 2. Translation & Layout Preservation
         print(f"[STEP] Starting Translation & Layout Preservation...")
         translation_start = time.time()
-        stats = translate_pdf_with_layout(input_pdf_path, output_pdf_path)
+        stats = await run_in_threadpool(run_with_pdf_lock, translate_pdf_with_layout, input_pdf_path, output_pdf_path)
         timings["translation_complete"] = time.time()
         print(f"[STEP] Translation complete in {timings['translation_complete'] - translation_start:.2f}s")
         
@@ -123,7 +125,7 @@ async def translate_pdf_endpoint(background_tasks: BackgroundTasks, file: Upload
         if full_text:
             print(f"[STEP] Indexing document {doc_id} to Qdrant...")
             indexing_start = time.time()
-            rag_service.index_document(doc_id, full_text)
+            await run_in_threadpool(rag_service.index_document, doc_id, full_text)
             timings["vector_indexing_complete"] = time.time()
             print(f"[STEP] Indexing complete in {timings['vector_indexing_complete'] - indexing_start:.2f}s")
         else:
@@ -4,6 +4,12 @@ Extracts text with bounding boxes from both text-based and scanned PDFs.
 """
 import pdfplumber
 import pytesseract
+try:
+    # Optional: in-process Tesseract bindings (avoids one subprocess + model load per call)
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 try:
     import fitz  # PyMuPDF
     PYMUPDF_AVAILABLE = True
@@ -11,12 +17,62 @@ except Exception:
     PYMUPDF_AVAILABLE = False
 import tempfile
 import os
-from pdf2image import convert_from_path
+import logging
+import multiprocessing
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 from typing import List, Dict, Tuple
 import re
+import unicodedata
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# C-level accessors for the word/span dicts used in sort keys and joins
+_TEXT = itemgetter('text')
+_X0 = itemgetter('x0')
+_X1 = itemgetter('x1')
+
+# Compiled once at import instead of per block/line group
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF]')
+
+# Page-level parallelism for PyMuPDF extraction (only worth it for longer documents)
+PYMUPDF_MAX_WORKERS = min(8, os.cpu_count() or 1)
+PYMUPDF_PAGES_PER_WORKER = 8
+OCR_MAX_WORKERS = os.cpu_count() or 1
+# Scanned pages are rasterized one at a time (inside the workers) at this DPI
+OCR_RENDER_DPI = 400
+
+# Per-process tesserocr handle, created once by init_ocr_worker; the lock keeps
+# concurrent requests in one process (e.g. the sequential path) off it at once
+_API = None
+_API_LOCK = threading.Lock()
+
+# Arabic-Indic digits (U+0660 to U+0669)
+ARABIC_INDIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+# Extended Arabic-Indic digits (U+06F0 to U+06F9) - Persian/Urdu
+EXTENDED_INDIC_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+WESTERN_DIGITS = '0123456789'
+
+# Built once at import: both numeral sets to Western digits, plus
+# robust character unification for search-ability and translation consistency:
+# Farsi/Urdu Yeh variants (0x06cc, 0x0649) -> Standard Arabic Yeh (0x064a),
+# Farsi Kaf (0x06a9) -> Standard Arabic Kaf (0x0643)
+_NORM_TABLE = str.maketrans(
+    ARABIC_INDIC_DIGITS + EXTENDED_INDIC_DIGITS + '\u06cc\u0649\u06a9',
+    WESTERN_DIGITS + WESTERN_DIGITS + '\u064a\u064a\u0643'
+)
 
 class TextBlock:
     """Represents a text block with its position and content"""
+    # Fixed attribute set: no per-instance __dict__ for the many blocks of large PDFs
+    __slots__ = ('text', 'x0', 'y0', 'x1', 'y1', 'width', 'height',
+                 'page_num', 'is_table', 'font_size', 'font_name')
+
     def __init__(self, text: str, x0: float, y0: float, x1: float, y1: float, 
                  page_num: int, is_table: bool = False):
         self.text = text.strip()
@@ -31,6 +87,35 @@ class TextBlock:
         self.font_size = None
         self.font_name = None
 
+class BlockArray:
+    """
+    Struct-of-arrays view over a list of text blocks.
+    Keeps bboxes as one contiguous (N, 4) array so geometric passes
+    (sorting, IoU dedup) run vectorized instead of chasing TextBlock objects.
+    """
+    __slots__ = ('bboxes', 'pages', 'texts', 'is_table')
+
+    def __init__(self, bboxes: np.ndarray, pages: np.ndarray, texts: List[str], is_table: np.ndarray):
+        self.bboxes = bboxes
+        self.pages = pages
+        self.texts = texts
+        self.is_table = is_table
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def from_blocks(cls, blocks: List[TextBlock]) -> 'BlockArray':
+        n = len(blocks)
+        bboxes = np.empty((n, 4), dtype=np.float64)
+        pages = np.empty(n, dtype=np.int32)
+        is_table = np.empty(n, dtype=bool)
+        for i, b in enumerate(blocks):
+            bboxes[i] = (b.x0, b.y0, b.x1, b.y1)
+            pages[i] = b.page_num
+            is_table[i] = b.is_table
+        return cls(bboxes, pages, [b.text for b in blocks], is_table)
+
 def extract_text_blocks_with_layout(pdf_path: str) -> List[TextBlock]:
     """
     Extract text blocks with bounding boxes from PDF.
@@ -83,80 +168,25 @@ def _extract_with_pymupdf(pdf_path: str) -> List[TextBlock]:
     """Extract text blocks using PyMuPDF for better structure on digital PDFs."""
     results: List[TextBlock] = []
     try:
-        doc = fitz.open(pdf_path)
-        for page_index in range(len(doc)):
-            page = doc.load_page(page_index)
-            page_num = page_index + 1
-            # Use dict to get blocks->lines->spans with bbox
-            data = page.get_text("dict")
-            height = page.rect.height
-            
-            for block in data.get("blocks", []):
-                if block.get("type", 0) != 0:
-                    continue  # skip images
-                
-                # Process line by line to preserve reading order
-                import re
-                arabic_re = re.compile(r'[\u0600-\u06FF]')
-                
-                line_texts = []
-                all_spans = []
-                
-                for line in block.get("lines", []):
-                    line_spans = []
-                    for span in line.get("spans", []):
-                        text = span.get("text", "").strip()
-                        if not text:
-                            continue
-                        x0, y0, x1, y1 = span["bbox"]
-                        # Convert to bottom-up (PyMuPDF uses top-left, we need bottom-left)
-                        by0 = height - y1
-                        by1 = height - y0
-                        
-                        span_data = {
-                            'text': text,
-                            'x0': x0,
-                            'y0': by0,
-                            'x1': x1,
-                            'y1': by1,
-                        }
-                        line_spans.append(span_data)
-                        all_spans.append(span_data)
-                    
-                    if not line_spans:
-                        continue
-                    
-                    # Check if line has Arabic
-                    has_arabic = any(arabic_re.search(s['text']) for s in line_spans)
-                    
-                    if has_arabic:
-                        # Arabic RTL: sort by right edge (x1) descending
-                        ordered = sorted(line_spans, key=lambda s: s['x1'], reverse=True)
-                    else:
-                        # LTR: sort by left edge (x0) ascending
-                        ordered = sorted(line_spans, key=lambda s: s['x0'])
-                    
-                    line_text = ' '.join(s['text'] for s in ordered)
-                    line_texts.append(line_text)
-                
-                text = '\n'.join(line_texts).strip()
-                
-                if not text:
-                    continue
-                
-                spans = all_spans
-                
-                # Calculate bounding box from all spans
-                x0 = min(s['x0'] for s in spans)
-                y0 = min(s['y0'] for s in spans)
-                x1 = max(s['x1'] for s in spans)
-                y1 = max(s['y1'] for s in spans)
-                
-                # Only add if we have valid text and dimensions
-                if text and (x1 - x0) > 0 and (y1 - y0) > 0:
-                    results.append(TextBlock(text, x0, y0, x1, y1, page_num))
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
+        
+        workers = min(PYMUPDF_MAX_WORKERS, page_count // PYMUPDF_PAGES_PER_WORKER)
+        if workers <= 1:
+            results = _extract_pages_pymupdf(pdf_path, range(page_count))
+        else:
+            # PyMuPDF is not thread-safe, so pages are split into contiguous
+            # chunks and each worker process opens the document once.
+            chunks = [
+                range(page_count * k // workers, page_count * (k + 1) // workers)
+                for k in range(workers)
+            ]
+            # Spawned, not forked: callers run on server threads after torch has
+            # started its own threads, and a forked child can inherit a held lock
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+                for chunk_blocks in ex.map(_extract_pages_pymupdf, [pdf_path] * workers, chunks):
+                    results.extend(chunk_blocks)
         
-        doc.close()
         print(f"PyMuPDF extracted {len(results)} text blocks")
     except Exception as e:
         print(f"PyMuPDF extraction failed: {e}")
@@ -165,137 +195,198 @@ def _extract_with_pymupdf(pdf_path: str) -> List[TextBlock]:
     
     return results
 
+def _extract_pages_pymupdf(pdf_path: str, page_indices) -> List[TextBlock]:
+    """Extract text blocks for a range of pages using a single document handle."""
+    results: List[TextBlock] = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in page_indices:
+            results.extend(_extract_page_pymupdf(doc.load_page(page_index), page_index + 1))
+    return results
+
+def _extract_page_pymupdf(page, page_num: int) -> List[TextBlock]:
+    """Extract text blocks from one PyMuPDF page."""
+    results: List[TextBlock] = []
+    # Use dict to get blocks->lines->spans with bbox
+    data = page.get_text("dict")
+    height = page.rect.height
+    
+    for block in data.get("blocks", []):
+        if block.get("type", 0) != 0:
+            continue  # skip images
+        
+        # Process line by line to preserve reading order
+        line_texts = []
+        all_spans = []
+        
+        for line in block.get("lines", []):
+            line_spans = []
+            for span in line.get("spans", []):
+                text = span.get("text", "").strip()
+                if not text:
+                    continue
+                x0, y0, x1, y1 = span["bbox"]
+                # Convert to bottom-up (PyMuPDF uses top-left, we need bottom-left)
+                by0 = height - y1
+                by1 = height - y0
+                
+                span_data = {
+                    'text': text,
+                    'x0': x0,
+                    'y0': by0,
+                    'x1': x1,
+                    'y1': by1,
+                }
+                line_spans.append(span_data)
+                all_spans.append(span_data)
+            
+            if not line_spans:
+                continue
+            
+            # Check if line has Arabic
+            has_arabic = any(_ARABIC_RE.search(s['text']) for s in line_spans)
+            
+            if has_arabic:
+                # Arabic RTL: sort by right edge (x1) descending
+                ordered = sorted(line_spans, key=_X1, reverse=True)
+            else:
+                # LTR: sort by left edge (x0) ascending
+                ordered = sorted(line_spans, key=_X0)
+            
+            line_text = ' '.join(map(_TEXT, ordered))
+            line_texts.append(line_text)
+        
+        text = '\n'.join(line_texts).strip()
+        
+        if not text:
+            continue
+        
+        spans = all_spans
+        
+        # Calculate bounding box from all spans
+        x0 = min(s['x0'] for s in spans)
+        y0 = min(s['y0'] for s in spans)
+        x1 = max(s['x1'] for s in spans)
+        y1 = max(s['y1'] for s in spans)
+        
+        # Only add if we have valid text and dimensions
+        if text and (x1 - x0) > 0 and (y1 - y0) > 0:
+            results.append(TextBlock(text, x0, y0, x1, y1, page_num))
+
+    return results
+
 def _group_words_into_blocks(words: List[Dict], page_num: int, page_height: float) -> List[TextBlock]:
     """Group words into text blocks based on proximity"""
     if not words:
         return []
     
-    blocks = []
-    current_line = []
-    current_y = None
     line_tolerance = 5  # pixels
+    # Convert all words to bottom-up coordinates in one vectorized pass
+    ys = page_height - np.fromiter((w['top'] for w in words), dtype=np.float64, count=len(words))
     
-    for word in words:
-        word_y = page_height - word['top']  # Convert to bottom-up coordinates
-        
-        if current_y is None or abs(word_y - current_y) <= line_tolerance:
-            # Same line
-            current_line.append(word)
-            if current_y is None:
-                current_y = word_y
-        else:
-            # New line - process current line
-            if current_line:
-                block = _create_block_from_words(current_line, page_num, page_height)
-                if block:
-                    blocks.append(block)
-            current_line = [word]
-            current_y = word_y
-    
-    # Process last line
-    if current_line:
-        block = _create_block_from_words(current_line, page_num, page_height)
+    blocks = []
+    for start, end in _line_spans(ys, line_tolerance):
+        block = _create_block_from_words(words[start:end], page_num, page_height, ys[start:end])
         if block:
             blocks.append(block)
     
     return blocks
 
-def _create_block_from_words(words: List[Dict], page_num: int, page_height: float) -> TextBlock:
+def _line_spans(ys: np.ndarray, tolerance: float) -> List[Tuple[int, int]]:
+    """
+    Split consecutive y positions into lines.
+    A line continues while entries stay within tolerance of the line's first entry.
+    Returns (start, end) index pairs.
+    """
+    spans = []
+    start = 0
+    anchor = None
+    for i, y in enumerate(ys.tolist()):
+        if anchor is None:
+            anchor = y
+        elif abs(y - anchor) > tolerance:
+            spans.append((start, i))
+            start, anchor = i, y
+    if anchor is not None:
+        spans.append((start, len(ys)))
+    return spans
+
+def _create_block_from_words(words: List[Dict], page_num: int, page_height: float,
+                             ys: np.ndarray = None) -> TextBlock:
     """Create a TextBlock from a list of words"""
     if not words:
         return None
     
-    # Calculate bounding box
+    if ys is None:
+        ys = page_height - np.fromiter((w['top'] for w in words), dtype=np.float64, count=len(words))
+    
+    # Calculate bounding box (ys are already bottom-up)
     x0 = min(w['x0'] for w in words)
-    y0 = page_height - max(w['top'] for w in words)  # Convert to bottom-up
+    y0 = float(ys.min())
     x1 = max(w['x1'] for w in words)
-    y1 = page_height - min(w['top'] for w in words)
+    y1 = float(ys.max())
     
     # Combine text with RTL awareness for Arabic
     # Group words by line first (similar y positions)
-    import re
-    arabic_re = re.compile(r'[\u0600-\u06FF]')
-    
-    # Group words into lines
-    lines = []
-    current_line = []
-    current_y = None
     y_tolerance = 3
-    
-    for word in words:
-        word_y = page_height - word['top']  # Already converted to bottom-up
-        if current_y is None or abs(word_y - current_y) <= y_tolerance:
-            current_line.append(word)
-            if current_y is None:
-                current_y = word_y
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = [word]
-            current_y = word_y
-    
-    if current_line:
-        lines.append(current_line)
+    lines = [words[start:end] for start, end in _line_spans(ys, y_tolerance)]
     
     # Process each line with proper RTL/LTR ordering
     line_texts = []
     for line_words in lines:
-        line_has_arabic = any(arabic_re.search(str(w.get('text',''))) for w in line_words)
+        line_has_arabic = any(_ARABIC_RE.search(str(w.get('text',''))) for w in line_words)
         if line_has_arabic:
             # Sort words right-to-left (descending x1) for Arabic
-            ordered = sorted(line_words, key=lambda w: w['x1'], reverse=True)
+            ordered = sorted(line_words, key=_X1, reverse=True)
         else:
             # Left-to-right default
-            ordered = sorted(line_words, key=lambda w: w['x0'])
-        line_text = ' '.join(w['text'] for w in ordered)
+            ordered = sorted(line_words, key=_X0)
+        line_text = ' '.join(map(_TEXT, ordered))
         line_texts.append(line_text)
     
     text = '\n'.join(line_texts)
     
     return TextBlock(text, x0, y0, x1, y1, page_num)
 
-def _iou(a: TextBlock, b: TextBlock) -> float:
-    ax0, ay0, ax1, ay1 = a.x0, a.y0, a.x1, a.y1
-    bx0, by0, bx1, by1 = b.x0, b.y0, b.x1, b.y1
-    ix0, iy0 = max(ax0, bx0), max(ay0, by0)
-    ix1, iy1 = min(ax1, bx1), min(ay1, by1)
-    iw, ih = max(0.0, ix1 - ix0), max(0.0, iy1 - iy0)
-    inter = iw * ih
-    if inter <= 0:
-        return 0.0
-    area_a = (ax1 - ax0) * (ay1 - ay0)
-    area_b = (bx1 - bx0) * (by1 - by0)
-    union = max(area_a + area_b - inter, 1e-6)
-    return inter / union
+def _iou_with(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one (x0, y0, x1, y1) box against each row of an (N, 4) array."""
+    ix0 = np.maximum(box[0], boxes[:, 0])
+    iy0 = np.maximum(box[1], boxes[:, 1])
+    ix1 = np.minimum(box[2], boxes[:, 2])
+    iy1 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(ix1 - ix0, 0.0, None) * np.clip(iy1 - iy0, 0.0, None)
+    area_a = (box[2] - box[0]) * (box[3] - box[1])
+    area_b = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = np.maximum(area_a + area_b - inter, 1e-6)
+    return np.where(inter > 0, inter / union, 0.0)
 
 def _postprocess_blocks(blocks: List[TextBlock]) -> List[TextBlock]:
     """Post-process blocks to remove duplicates while preserving reading order"""
     if not blocks:
         return []
-    by_page = {}
-    for b in blocks:
-        by_page.setdefault(b.page_num, []).append(b)
+    arr = BlockArray.from_blocks(blocks)
+    x0, y0, x1, y1 = arr.bboxes.T
+    # Drop empty and degenerate blocks up front
+    valid = np.fromiter((bool(t.strip()) for t in arr.texts), dtype=bool, count=len(arr))
+    valid &= ((x1 - x0) > 2) & ((y1 - y0) > 2)
+    
+    # Rank pages by first appearance, then one stable sort groups the blocks by
+    # page and puts each page in reading order: top to bottom, then left to right
+    _, first_idx, inverse = np.unique(arr.pages, return_index=True, return_inverse=True)
+    page_rank = np.argsort(np.argsort(first_idx))[inverse.ravel()]
+    order = np.lexsort((x0, -y1, page_rank))
+    bounds = np.flatnonzero(np.diff(page_rank[order])) + 1
+    
     cleaned = []
-    for page, arr in by_page.items():
-        # Sort by reading order: top to bottom, then left to right
-        arr_sorted = sorted(arr, key=lambda b: (-b.y1, b.x0))
-        kept = []
-        for b in arr_sorted:
-            if not b.text or len(b.text.strip()) == 0:
-                continue
-            if b.width <= 2 or b.height <= 2:
+    for idx in np.split(order, bounds):
+        kept_by_text = defaultdict(list)
+        for i in idx[valid[idx]].tolist():
+            # Only remove if text is identical AND positions are very similar
+            # Don't remove if one text is substring of another - might be valid
+            same_text = kept_by_text.get(arr.texts[i])
+            if same_text and (_iou_with(arr.bboxes[i], arr.bboxes[same_text]) > 0.9).any():
                 continue
-            # Check for duplicates - but be more lenient to avoid removing valid blocks
-            dup = False
-            for k in kept:
-                # Only remove if text is identical AND positions are very similar
-                if k.text == b.text and _iou(k, b) > 0.9:
-                    dup = True
-                    break
-                # Don't remove if one text is substring of another - might be valid
-            if not dup:
-                kept.append(b)
-        cleaned.extend(kept)
+            kept_by_text[arr.texts[i]].append(i)
+            cleaned.append(blocks[i])
     return cleaned
 
 def _extract_table_blocks(table: List[List], page_num: int, page_height: float) -> List[TextBlock]:
@@ -321,110 +412,23 @@ def _extract_with_ocr(pdf_path: str) -> List[TextBlock]:
     blocks = []
     
     try:
-        # Convert PDF to images with higher DPI for better accuracy
-        images = convert_from_path(pdf_path, dpi=400)
+        # Pages are rendered at high DPI one at a time where they are OCR'd,
+        # so peak memory is one page per worker rather than the whole document
+        page_count = _page_count(pdf_path)
+        page_nums = range(1, page_count + 1)
         
-        for page_num, image in enumerate(images, 1):
-            # Try multiple PSM modes for better results
-            psm_modes = ['6', '3', '4']  # 6=uniform block, 3=auto, 4=single column
-            best_blocks = []
-            
-            for psm in psm_modes:
-                try:
-                    # Get OCR data with bounding boxes
-                    ocr_data = pytesseract.image_to_data(
-                        image,
-                        lang='ara',
-                        output_type=pytesseract.Output.DICT,
-                        config=f'--psm {psm} --oem 1'
-                    )
-                    
-                    # Group words into blocks with better line detection
-                    page_blocks = []
-                    current_block_words = []
-                    current_y = None
-                    current_line_height = None
-                    y_tolerance = 8  # Tighter tolerance for better line grouping
-                    
-                    for i in range(len(ocr_data['text'])):
-                        text = ocr_data['text'][i].strip()
-                        conf = int(ocr_data['conf'][i]) if ocr_data['conf'][i] else 0
-                        
-                        # Skip low confidence or empty text
-                        if not text or conf < 30:
-                            continue
-                        
-                        # Get word position (pytesseract uses top-left origin)
-                        x = ocr_data['left'][i]
-                        top = ocr_data['top'][i]
-                        w = ocr_data['width'][i]
-                        h = ocr_data['height'][i]
-                        
-                        # Convert to bottom-left origin (for consistency with PDF coordinates)
-                        y = image.height - top - h
-                        
-                        # Check if this word is on the same line
-                        if current_y is None:
-                            current_block_words.append({
-                                'text': text,
-                                'x0': x,
-                                'y0': y,
-                                'x1': x + w,
-                                'y1': y + h,
-                                'conf': conf
-                            })
-                            current_y = y
-                            current_line_height = h
-                        elif abs(y - current_y) <= y_tolerance:
-                            # Same line - add to current block
-                            current_block_words.append({
-                                'text': text,
-                                'x0': x,
-                                'y0': y,
-                                'x1': x + w,
-                                'y1': y + h,
-                                'conf': conf
-                            })
-                            # Update average y position
-                            current_y = sum(w['y0'] for w in current_block_words) / len(current_block_words)
-                        else:
-                            # New line - create block from current words
-                            if current_block_words:
-                                block = _create_block_from_ocr_words(
-                                    current_block_words, page_num, image.width, image.height
-                                )
-                                if block:
-                                    page_blocks.append(block)
-                            
-                            # Start new block
-                            current_block_words = [{
-                                'text': text,
-                                'x0': x,
-                                'y0': y,
-                                'x1': x + w,
-                                'y1': y + h,
-                                'conf': conf
-                            }]
-                            current_y = y
-                            current_line_height = h
-                    
-                    # Process last block
-                    if current_block_words:
-                        block = _create_block_from_ocr_words(
-                            current_block_words, page_num, image.width, image.height
-                        )
-                        if block:
-                            page_blocks.append(block)
-                    
-                    # Use the result with most blocks (likely most complete)
-                    if len(page_blocks) > len(best_blocks):
-                        best_blocks = page_blocks
-                        
-                except Exception as e:
-                    print(f"OCR extraction with PSM {psm} failed: {e}")
-                    continue
-            
-            blocks.extend(best_blocks)
+        workers = min(OCR_MAX_WORKERS, page_count)
+        if workers > 1:
+            # Each worker loads the Arabic model once (initializer) and keeps it for all its pages;
+            # spawned rather than forked from the calling server thread, like the PyMuPDF pool
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_ocr_worker,
+                                     mp_context=multiprocessing.get_context("spawn")) as ex:
+                for page_blocks in ex.map(_ocr_pdf_page, [pdf_path] * page_count, page_nums):
+                    blocks.extend(page_blocks)
+        else:
+            init_ocr_worker()
+            for page_num in page_nums:
+                blocks.extend(_ocr_pdf_page(pdf_path, page_num))
                     
     except Exception as e:
         print(f"OCR extraction failed: {e}")
@@ -433,6 +437,194 @@ def _extract_with_ocr(pdf_path: str) -> List[TextBlock]:
     
     return blocks
 
+def _page_count(pdf_path: str) -> int:
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    return pdfinfo_from_path(pdf_path)['Pages']
+
+def _render_ocr_page(pdf_path: str, page_num: int) -> Image.Image:
+    """Rasterize a single (1-based) page for OCR."""
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(pdf_path) as doc:
+            pix = doc.load_page(page_num - 1).get_pixmap(dpi=OCR_RENDER_DPI, alpha=False)
+        return Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    return convert_from_path(pdf_path, dpi=OCR_RENDER_DPI, first_page=page_num, last_page=page_num)[0]
+
+def _ocr_pdf_page(pdf_path: str, page_num: int) -> List[TextBlock]:
+    """Render and OCR one page; module-level so it can run in a worker process."""
+    return _ocr_page_blocks(page_num, _render_ocr_page(pdf_path, page_num))
+
+def init_ocr_worker():
+    """
+    Create this process's Tesseract handle once so the Arabic model is not reloaded per page.
+    Used as the ProcessPoolExecutor initializer by both OCR paths.
+    """
+    global _API
+    if TESSEROCR_AVAILABLE and _API is None:
+        try:
+            _API = tesserocr.PyTessBaseAPI(lang='ara', oem=tesserocr.OEM.LSTM_ONLY)
+        except Exception as e:
+            logger.warning(f"tesserocr init failed, using pytesseract: {e}")
+
+def image_to_data(image, psm: str, extra_config: str = '') -> Dict[str, list]:
+    """
+    Word-level OCR in pytesseract's image_to_data DICT layout.
+    Uses the process's persistent tesserocr handle when available,
+    otherwise spawns tesseract through pytesseract.
+    extra_config takes tesseract '-c name=value' options on either path.
+    """
+    if _API is None:
+        config = f'--psm {psm} --oem 1'
+        if extra_config:
+            config = f'{config} {extra_config}'
+        return pytesseract.image_to_data(
+            image,
+            lang='ara',
+            output_type=pytesseract.Output.DICT,
+            config=config
+        )
+    
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    variables = _config_variables(extra_config)
+    with _API_LOCK:
+        # The handle is shared by later calls: set the variables for this call only
+        saved = {name: _API.GetVariableAsString(name) for name in variables}
+        try:
+            for name, value in variables.items():
+                _API.SetVariable(name, value)
+            return _api_image_to_data(image, psm)
+        finally:
+            for name, value in saved.items():
+                if value is not None:
+                    _API.SetVariable(name, value)
+
+def _config_variables(extra_config: str) -> Dict[str, str]:
+    """The '-c name=value' pairs of a tesseract command-line config string."""
+    tokens = extra_config.split()
+    return dict(tokens[i + 1].split('=', 1) for i, tok in enumerate(tokens[:-1])
+                if tok == '-c' and '=' in tokens[i + 1])
+
+def _api_image_to_data(image, psm: str) -> Dict[str, list]:
+    _API.SetPageSegMode(int(psm))
+    _API.SetImage(image)
+    _API.Recognize()
+    
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': [],
+            'block_num': [], 'par_num': [], 'line_num': []}
+    level = tesserocr.RIL.WORD
+    block_num = par_num = line_num = 0
+    for r in tesserocr.iterate_level(_API.GetIterator(), level):
+        # Layout counters only need to be unique per line, not reset per block like Tesseract's TSV
+        if r.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+            block_num += 1
+        if r.IsAtBeginningOf(tesserocr.RIL.PARA):
+            par_num += 1
+        if r.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+            line_num += 1
+        box = r.BoundingBox(level)
+        if box is None:
+            continue
+        x0, y0, x1, y1 = box
+        data['text'].append(r.GetUTF8Text(level) or '')
+        data['conf'].append(r.Confidence(level))
+        data['left'].append(x0)
+        data['top'].append(y0)
+        data['width'].append(x1 - x0)
+        data['height'].append(y1 - y0)
+        data['block_num'].append(block_num)
+        data['par_num'].append(par_num)
+        data['line_num'].append(line_num)
+    return data
+
+def _ocr_page_blocks(page_num: int, image) -> List[TextBlock]:
+    """OCR one page image, keeping the PSM mode that yields the most blocks."""
+    # Try multiple PSM modes for better results
+    psm_modes = ['6', '3', '4']  # 6=uniform block, 3=auto, 4=single column
+    best_blocks = []
+
+    for psm in psm_modes:
+        try:
+            # Get OCR data with bounding boxes
+            ocr_data = image_to_data(image, psm)
+
+            # Filter tokens in bulk: skip low confidence or empty text
+            texts = [t.strip() for t in ocr_data['text']]
+            confs = np.asarray([c if c else 0 for c in ocr_data['conf']], dtype=np.float64)
+            lefts = np.asarray(ocr_data['left'], dtype=np.int64)
+            tops = np.asarray(ocr_data['top'], dtype=np.int64)
+            widths = np.asarray(ocr_data['width'], dtype=np.int64)
+            heights = np.asarray(ocr_data['height'], dtype=np.int64)
+            mask = (confs >= 30) & np.fromiter((bool(t) for t in texts), dtype=bool, count=len(texts))
+            keep = np.flatnonzero(mask)
+
+            # Convert to bottom-left origin (for consistency with PDF coordinates)
+            # pytesseract uses top-left origin
+            xs = lefts[keep]
+            ys = image.height - tops[keep] - heights[keep]
+            x1s = xs + widths[keep]
+            y1s = ys + heights[keep]
+
+            # Group words into blocks with better line detection
+            page_blocks = []
+            current_block_words = []
+            current_y = None
+            current_sum = 0.0  # Running sum of y0 for the current line
+            y_tolerance = 8  # Tighter tolerance for better line grouping
+
+            for i, x, y, x1, y1 in zip(keep.tolist(), xs.tolist(), ys.tolist(),
+                                       x1s.tolist(), y1s.tolist()):
+                word = {
+                    'text': texts[i],
+                    'x0': x,
+                    'y0': y,
+                    'x1': x1,
+                    'y1': y1,
+                    'conf': int(confs[i])
+                }
+
+                # Check if this word is on the same line
+                if current_y is None:
+                    current_block_words.append(word)
+                    current_y = current_sum = y
+                elif abs(y - current_y) <= y_tolerance:
+                    # Same line - add to current block
+                    current_block_words.append(word)
+                    # Update average y position incrementally
+                    current_sum += y
+                    current_y = current_sum / len(current_block_words)
+                else:
+                    # New line - create block from current words
+                    if current_block_words:
+                        block = _create_block_from_ocr_words(
+                            current_block_words, page_num, image.width, image.height
+                        )
+                        if block:
+                            page_blocks.append(block)
+
+                    # Start new block
+                    current_block_words = [word]
+                    current_y = current_sum = y
+
+            # Process last block
+            if current_block_words:
+                block = _create_block_from_ocr_words(
+                    current_block_words, page_num, image.width, image.height
+                )
+                if block:
+                    page_blocks.append(block)
+
+            # Use the result with most blocks (likely most complete)
+            if len(page_blocks) > len(best_blocks):
+                best_blocks = page_blocks
+
+        except Exception as e:
+            print(f"OCR extraction with PSM {psm} failed: {e}")
+            continue
+
+    return best_blocks
+
 def _create_block_from_ocr_words(words: List[Dict], page_num: int, 
                                  page_width: float, page_height: float) -> TextBlock:
     """Create TextBlock from OCR words"""
@@ -445,14 +637,12 @@ def _create_block_from_ocr_words(words: List[Dict], page_num: int,
     y1 = max(w['y1'] for w in words)
     
     # Combine text with RTL awareness for Arabic
-    import re
-    arabic_re = re.compile(r'[\u0600-\u06FF]')
-    has_arabic = any(arabic_re.search(str(w.get('text',''))) for w in words)
+    has_arabic = any(_ARABIC_RE.search(str(w.get('text',''))) for w in words)
     if has_arabic:
-        ordered = sorted(words, key=lambda w: w['x1'], reverse=True)
+        ordered = sorted(words, key=_X1, reverse=True)
     else:
-        ordered = sorted(words, key=lambda w: w['x0'])
-    text = ' '.join(w['text'] for w in ordered)
+        ordered = sorted(words, key=_X0)
+    text = ' '.join(map(_TEXT, ordered))
     
     return TextBlock(text, x0, y0, x1, y1, page_num)
 
@@ -463,31 +653,14 @@ def normalize_arabic_numerals(text: str) -> str:
     - Convert Extended Arabic-Indic numerals (۰-۹) to Western (0-9)
     - Normalize presentation forms to base characters
     """
-    import unicodedata
-    
-    # Arabic-Indic digits (U+0660 to U+0669)
-    arabic_indic = '٠١٢٣٤٥٦٧٨٩'
-    # Extended Arabic-Indic digits (U+06F0 to U+06F9) - Persian/Urdu
-    extended_indic = '۰۱۲۳۴۵۶۷۸۹'
-    # Western digits
-    western = '0123456789'
-    
-    # Create translation table for both numeral sets
-    trans_table = str.maketrans(
-        arabic_indic + extended_indic,
-        western + western
-    )
-    text = text.translate(trans_table)
+    # Pure-ASCII text (translations, Latin labels) is a fixed point of both passes
+    if text.isascii():
+        return text
     
     # Normalize presentation forms (U+FB50-U+FDFF, U+FE70-U+FEFF) to base characters
-    # NFKC normalization converts compatibility characters to their canonical equivalents
+    # NFKC normalization converts compatibility characters to their canonical equivalents.
+    # It runs first so the letters it produces are unified by the table below.
     text = unicodedata.normalize('NFKC', text)
     
-    # Robust Character Unification for search-ability and translation consistency
-    # Unify Farsi/Urdu Yeh variants (0x06cc, 0x0649) to Standard Arabic Yeh (0x064a)
-    text = text.replace('\u06cc', '\u064a').replace('\u0649', '\u064a')
-    # Unify Farsi Kaf (0x06a9) to Standard Arabic Kaf (0x0643)
-    text = text.replace('\u06a9', '\u0643')
-    
-    return text
-
+    # Digit folding and Yeh/Kaf unification in a single C-level pass
+    return text.translate(_NORM_TABLE)
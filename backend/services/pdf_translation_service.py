@@ -6,45 +6,34 @@ import tempfile
 import os
 import re
 import shutil
-import time
 import gc
-from typing import Tuple, List, Optional, Dict, Any
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import pdfplumber
 
-from services.layout_extraction_service import (
-    extract_text_blocks_with_layout,
-    TextBlock,
-    normalize_arabic_numerals
-)
-from services.table_extraction_service import (
-    extract_tables_from_pdf,
-    extract_tables_from_ocr,
-    Table
-)
-from services.translate_service import translate_batch
+from services.layout_extraction_service import normalize_arabic_numerals
 
 # Maryum Services Integration (Renamed to Tables Service)
 try:
-    from services.tables_service import (
-        TableDetectionService, 
-        PDFExtractionService, 
-        TranslationService, 
-        TranslatorModel,
-        TableConfig
-    )
+    from services.tables_service import TableDetectionService, PDFExtractionService
     MARYUM_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Tables services not available: {e}")
     MARYUM_AVAILABLE = False
     TableDetectionService = None
     PDFExtractionService = None
-    TranslationService = None
-    TranslatorModel = None
 
 # Try to import PyMuPDF
 try:
     import fitz
     PYMUPDF_AVAILABLE = True
+    # "dict" extraction without image blocks: their decoded bytes are never used
+    # here and dominate the per-page dict on scanned/image-heavy PDFs
+    _TEXT_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    # Metrics for the two Base-14 fonts Phase 3 draws with, loaded once per process
+    _FONTS = {name: fitz.Font(name) for name in ("helv", "hebo")}
 except ImportError:
     PYMUPDF_AVAILABLE = False
     print("Warning: PyMuPDF not available.")
@@ -56,31 +45,63 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
 
+# Phase 1 collection is split across processes only for long documents
+COLLECT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+COLLECT_PAGES_PER_WORKER = 16
+
+# Pages are collected, translated and rendered in windows of this size, which
+# bounds the queued segments and per-page ops held in memory at once
+TRANSLATE_WINDOW_PAGES = 64
+
+# Compiled once at import; also visible to the Phase 1 worker processes
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# ocrmypdf runs one Tesseract process per page on this many workers; the OCR'd
+# copy is only a working file (Phase 3 rewrites it), so its images are not optimized
+OCR_JOBS = os.cpu_count() or 1
+
+# Translated text is shrunk to fit its box, but never below this size
+MIN_FONT_SIZE = 4
+
 def _ensure_searchable_pdf(pdf_path: str) -> str:
     if not PYMUPDF_AVAILABLE: return pdf_path
     try:
-        doc = fitz.open(pdf_path)
-        text_len = 0
-        for i in range(min(3, len(doc))):
-            text = doc[i].get_text()
-            if text.strip(): text_len += len(text.strip())
-        doc.close()
-        if text_len > 50: return pdf_path
+        if _has_text_layer(pdf_path): return pdf_path
         if not OCR_AVAILABLE: return pdf_path
         print("Scanned PDF detected. Running OCR...")
         temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf'); os.close(temp_fd)
         try:
-            ocrmypdf.ocr(pdf_path, temp_path, language='ara', force_ocr=True, progress_bar=False, deskew=True)
+            ocrmypdf.ocr(pdf_path, temp_path, language='ara', force_ocr=True, progress_bar=False, deskew=True,
+                         jobs=OCR_JOBS, use_threads=True, optimize=0)
             return temp_path
         except:
             if os.path.exists(temp_path): os.unlink(temp_path)
             return pdf_path
     except: return pdf_path
 
+def _has_text_layer(pdf_path: str) -> bool:
+    """
+    True if OCR would not help: most of the first pages already carry Arabic or
+    more than 50 chars of extractable text, or they have no images to recognize.
+    """
+    with fitz.open(pdf_path) as doc:
+        if not doc.is_pdf: return False
+        pages = range(min(3, len(doc)))
+        # A majority, not any one page: a born-digital cover in front of
+        # scanned pages must not skip OCR for the whole document
+        needed = len(pages) // 2 + 1
+        with_text = 0
+        for i in pages:
+            text = doc[i].get_text("text", flags=fitz.TEXT_PRESERVE_LIGATURES).strip()
+            if len(text) > 50 or _ARABIC_RE.search(text):
+                with_text += 1
+                # Stop before parsing the (possibly image-heavy) remaining pages
+                if with_text >= needed: return True
+        return not any(doc[i].get_images() for i in pages)
+
 def translate_pdf_inplace(pdf_path: str, output_path: str) -> dict:
     if not PYMUPDF_AVAILABLE: raise Exception("PyMuPDF required.")
     
-    start_time = time.time()
     working_pdf_path = _ensure_searchable_pdf(pdf_path)
     is_temp_file = working_pdf_path != pdf_path
 
@@ -88,10 +109,12 @@ def translate_pdf_inplace(pdf_path: str, output_path: str) -> dict:
     print("Exact Replica PDF Translation (Fidelity Optimized)")
     print("=" * 60)
 
-    doc = fitz.open(working_pdf_path)
+    # Edit a copy at output_path: a document Phase 3 leaves untouched (no Arabic
+    # anywhere) is then saved incrementally instead of re-serialized
+    if os.path.abspath(output_path) != os.path.abspath(working_pdf_path):
+        shutil.copyfile(working_pdf_path, output_path)
+    doc = fitz.open(output_path)
     total_pages = len(doc)
-    arabic_pattern = re.compile(r'[\u0600-\u06FF\uFB50-\uFDFF\uFE70-\uFEFF]')
-    numeric_pattern = re.compile(r'^[\d\s\.,\-\+\*/%$€£¥₹\(\)\[\]]+$')
     
     stats = {
         'pages_processed': total_pages, 
@@ -102,185 +125,63 @@ def translate_pdf_inplace(pdf_path: str, output_path: str) -> dict:
         'segments': []  # Structured data for Excel/JSON
     }
 
-    font_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "fonts")
-    font_path = os.path.join(font_dir, "NotoSans-Regular.ttf")
-    font_path_bold = os.path.join(font_dir, "NotoSans-Bold.ttf")
-    has_custom_font = os.path.exists(font_path)
-    has_custom_font_bold = os.path.exists(font_path_bold)
+    # Pages go through collection, translation and rendering one window at a
+    # time, so segment queues and per-page ops never cover the whole document.
+    # Long documents run Phase 1 in worker processes (PyMuPDF is not thread-safe).
+    # Workers are spawned, not forked: this runs on a server thread after torch
+    # has started its own threads, and a forked child can inherit a held lock
+    workers = min(COLLECT_MAX_WORKERS, total_pages // COLLECT_PAGES_PER_WORKER)
+    pool = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if workers > 1 else None)
+    table_services = _open_table_services(working_pdf_path) if pool is None else None
+    redacted = False
+    try:
+        windows = [range(start, min(start + TRANSLATE_WINDOW_PAGES, total_pages))
+                   for start in range(0, total_pages, TRANSLATE_WINDOW_PAGES)]
+        collected = _submit_collection(pool, working_pdf_path, windows[0]) if pool is not None else None
+        for w_idx, window in enumerate(windows):
 
-    maryum_available = False
-    if MARYUM_AVAILABLE:
-        try:
-            from services.tables_service import TableDetectionService, PDFExtractionService
-            maryum_detector = TableDetectionService()
-            maryum_extractor = PDFExtractionService()
-            maryum_available = True
-        except: pass
+            # --- PHASE 1: UNIVERSAL COLLECTION ---
+            print(f"\n[Phase 1] Collecting text segments from pages {window.start + 1}-{window.stop}/{total_pages}...")
+            # Distinct normalized segment -> queue index, in first-seen order
+            global_queue = {}
+            pages_ops = {}
+            if pool is None:
+                for page_num in window:
+                    print(f"  Scanning page {page_num + 1}/{total_pages}...", end='\r')
+                    pages_ops[page_num] = _collect_page_ops(doc[page_num], page_num, global_queue, working_pdf_path, table_services)
+            else:
+                for f in collected:
+                    # Chunk queues are local; re-intern them into the window's queue
+                    ops_by_page, queue = f.result()
+                    mapping = [_enqueue(global_queue, t) for t in queue]
+                    for ops in ops_by_page.values():
+                        _remap_queue_indices(ops, mapping)
+                    pages_ops.update(ops_by_page)
+                # Workers collect the next window while this one is translated
+                if w_idx + 1 < len(windows):
+                    collected = _submit_collection(pool, working_pdf_path, windows[w_idx + 1])
 
-    # --- PHASE 1: UNIVERSAL COLLECTION ---
-    print(f"\n[Phase 1] Collecting ALL text segments from {total_pages} pages...")
-    global_queue = []
-    pages_ops = {}
-    
-    for page_num in range(total_pages):
-        page = doc[page_num]
-        print(f"  Scanning page {page_num + 1}/{total_pages}...", end='\r')
-        ops = {'tables': [], 'text_blocks': []}
-        table_exclusion = []
-        
-        if maryum_available:
-            try:
-                m_configs = maryum_detector.detect_tables_on_page(working_pdf_path, page_num)
-                if m_configs:
-                    extracted = maryum_extractor.extract_tables(working_pdf_path, m_configs, None, f"p{page_num}")
-                    if extracted:
-                        for orig_csv, layout in extracted:
-                            try:
-                                df = pd.read_csv(orig_csv, header=None).fillna("")
-                                if df.empty or not layout: continue
-                                bbox = (min(c.x0 for r in layout for c in r), min(c.y0 for r in layout for c in r),
-                                        max(c.x1 for r in layout for c in r), max(c.y1 for r in layout for c in r))
-                                table_exclusion.append(bbox)
-                                t_item = {"type": "maryum_table", "df_json": df.to_json(), "layout": layout, "rect": bbox, "indices": {}}
-                                for r_idx, row in df.iterrows():
-                                    for c_idx, val in enumerate(row):
-                                        val_s = str(val).strip()
-                                        if val_s:
-                                            # Always collect for table cells to ensure full Excel
-                                            t_item['indices'][f"{r_idx},{c_idx}"] = len(global_queue)
-                                            global_queue.append(normalize_arabic_numerals(val_s))
-                                ops['tables'].append(t_item)
-                            except: pass
-            except: pass
-        
-        if not ops['tables']:
-            try:
-                for table in page.find_tables():
-                    table_exclusion.append(tuple(table.bbox))
-                    lt = {"type": "legacy", "bbox": tuple(table.bbox), "cells": []}
-                    for row in table.rows:
-                        for cell in row.cells:
-                            txt = page.get_text("text", clip=cell).strip()
-                            c_data = {"rect": tuple(cell), "text": txt, "idx": None}
-                            if txt:
-                                c_data["idx"] = len(global_queue)
-                                global_queue.append(normalize_arabic_numerals(txt))
-                            lt["cells"].append(c_data)
-                    ops['tables'].append(lt)
-            except: pass
-
-        for block in page.get_text("dict")["blocks"]:
-            if "lines" not in block: continue
-            if any(fitz.Rect(tr).intersects(fitz.Rect(block["bbox"])) for tr in table_exclusion): continue
-            
-            for line in block["lines"]:
-                line_text = " ".join(s["text"].strip() for s in line["spans"] if s["text"].strip())
-                if not line_text: continue
-                
-                is_bold = any(s.get("flags", 0) & 16 for s in line["spans"])
-                max_size = max(s.get("size", 10) for s in line["spans"])
-                
-                l_item = {
-                    'text': line_text, 
-                    'bbox': line["bbox"], 
-                    'size': max_size, 
-                    'is_bold': is_bold,
-                    'idx': len(global_queue),
-                    'type': 'heading' if is_bold or max_size > 14 else 'body'
-                }
-                global_queue.append(normalize_arabic_numerals(line_text))
-                ops['text_blocks'].append(l_item)
-        pages_ops[page_num] = ops
-
-    # --- PHASE 2: BATCH TRANSLATION ---
-    unique = sorted(list(set(global_queue)))
-    t_map = dict(zip(unique, translate_batch(unique, batch_size=32))) if unique else {}
-    results = [t_map.get(t, t) for t in global_queue]
+            # --- PHASE 2: BATCH TRANSLATION ---
+            results = _translate_queue(global_queue)
 
-    # --- PHASE 3: RENDERING ---
-    print(f"\n[Phase 3] Applying Precision Redactions and Standard Font Rendering...")
-    try:
-        for page_num in range(total_pages):
-            page = doc[page_num]
-            ops = pages_ops.get(page_num, {'tables': [], 'text_blocks': []})
-            
-            # 1. Redact all segments
-            redact_count = 0
-            for b in ops['text_blocks']:
-                page.add_redact_annot(fitz.Rect(b['bbox']), fill=(1,1,1))
-                redact_count += 1
-            for t in ops['tables']:
-                t_bbox = t.get('rect') or t.get('bbox')
-                if t_bbox:
-                    page.add_redact_annot(fitz.Rect(t_bbox), fill=(1,1,1))
-                    redact_count += 1
-            
-            # Security sweep for any remaining Arabic artifacts
-            for b in page.get_text("dict")["blocks"]:
-                if b.get("type") != 0: continue
-                for l in b.get("lines", []):
-                    for s in l.get("spans", []):
-                        if arabic_pattern.search(s["text"]):
-                            page.add_redact_annot(fitz.Rect(s["bbox"]), fill=(1,1,1))
-                            redact_count += 1
-            
-            page.apply_redactions()
-            
-            # 2. Render with Standard Fonts (guarantees visibility)
-            f_regular = "helv"
-            f_bold = "hebo" # Helvetica-Bold in PyMuPDF
-
-            # Tables
-            for t in ops['tables']:
-                if t['type'] == 'maryum_table':
-                    df = pd.read_json(t['df_json'])
-                    for r_idx, row in df.iterrows():
-                        for c_idx, val in enumerate(row):
-                            q_idx = t['indices'].get(f"{r_idx},{c_idx}")
-                            if q_idx is None: continue
-                            txt = results[q_idx]
-                            if not txt or arabic_pattern.search(txt):
-                                txt = re.sub(arabic_pattern, '', txt or "").strip() or normalize_arabic_numerals(str(val))
-                            layout = t['layout'][r_idx][c_idx]
-                            page.insert_textbox(fitz.Rect(layout.x0, layout.y0, layout.x1, layout.y1), txt, fontsize=8, fontname=f_regular)
-                            stats['segments'].append({'page': page_num+1, 'type': 'table_cell', 'original': str(val), 'translated': txt})
-                            stats['full_translated_text'].append(txt)
-                            stats['full_original_text'].append(str(val))
-                else:
-                    for c in t['cells']:
-                        if c['idx'] is None: continue
-                        txt = results[c['idx']]
-                        if not txt or arabic_pattern.search(txt):
-                            txt = re.sub(arabic_pattern, '', txt or "").strip() or normalize_arabic_numerals(c['text'])
-                        page.insert_textbox(fitz.Rect(c['rect']), txt, fontsize=8, fontname=f_regular)
-                        stats['segments'].append({'page': page_num+1, 'type': 'legacy_table_cell', 'original': c['text'], 'translated': txt})
-                        stats['full_translated_text'].append(txt)
-                        stats['full_original_text'].append(c['text'])
-
-            # Blocks
-            for b in ops['text_blocks']:
-                txt = results[b['idx']]
-                orig_txt = b['text']
-                if not txt or arabic_pattern.search(txt):
-                    txt = re.sub(arabic_pattern, '', txt or "").strip() or normalize_arabic_numerals(orig_txt)
-                
-                # Fidelity Fix: Slightly smaller font + larger box to ensure visibility
-                f_size = b['size'] * 0.8
-                rect = fitz.Rect(b['bbox'])
-                rect.y1 += (rect.y1 - rect.y0) * 0.3 # Allow more height for wrapping
-                rect.x1 += 5 # Slight width buffer
-                
-                font = f_bold if b['is_bold'] or b['type'] == 'heading' else f_regular
-                page.insert_textbox(rect, txt, fontsize=f_size, fontname=font, align=fitz.TEXT_ALIGN_LEFT)
-                
-                stats['full_translated_text'].append(txt)
-                stats['full_original_text'].append(orig_txt)
-                stats['text_blocks_translated'] += 1
-                stats['segments'].append({'page': page_num+1, 'type': b['type'], 'original': orig_txt, 'translated': txt})
+            # --- PHASE 3: RENDERING ---
+            # Always in-process on the original document, so its forms, outline,
+            # page labels and metadata survive untouched
+            print(f"\n[Phase 3] Applying Precision Redactions and Standard Font Rendering...")
+            for page_num in window:
+                redacted = _render_page_ops(doc[page_num], page_num, pages_ops[page_num], results, stats) or redacted
+                if page_num % 20 == 0: _release_caches()
+            del global_queue, pages_ops, results
+        if table_services: table_services[2].close()
 
-            if page_num % 20 == 0: gc.collect()
-
-        doc.save(output_path, garbage=3, deflate=True)
+        if not redacted and doc.can_save_incrementally():
+            doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        else:
+            # An incremental update would keep the original Arabic content streams
+            # and fonts recoverable from the earlier revision; a repaired file
+            # (broken xref) can only be fully rewritten anyway
+            _save_replacing(doc, output_path)
         doc.close()
         if is_temp_file and os.path.exists(working_pdf_path): os.unlink(working_pdf_path)
         stats['full_text_content'] = "\n\n".join(stats['full_translated_text'])
@@ -290,5 +191,389 @@ def translate_pdf_inplace(pdf_path: str, output_path: str) -> dict:
     except Exception as e:
         if 'doc' in locals(): doc.close()
         raise Exception(f"Failed: {e}")
+    finally:
+        if pool is not None: pool.shutdown(cancel_futures=True)
+
+def _open_table_services(pdf_path: str):
+    """(detector, extractor, open pdfplumber doc) for Phase 1, or None if the tables service is unavailable."""
+    if not MARYUM_AVAILABLE: return None
+    try:
+        # One pdfplumber parse for all of Phase 1; the table services would
+        # otherwise re-open the file 2+ times per page
+        return (TableDetectionService(), PDFExtractionService(), pdfplumber.open(pdf_path))
+    except:
+        return None
+
+def _release_caches() -> None:
+    """
+    Drop Python garbage and empty MuPDF's object store, which otherwise keeps
+    every decoded page image alive and grows past 1GB on long scanned PDFs.
+    """
+    gc.collect()
+    fitz.TOOLS.store_shrink(100)
+
+def _submit_collection(pool, pdf_path: str, window: range) -> list:
+    """Queue Phase 1 for a window's page chunks; futures resolve in page order."""
+    return [pool.submit(_collect_page_range, pdf_path, pages) for pages in _page_chunks(window)]
+
+def _collect_page_range(pdf_path: str, pages: range):
+    """Worker: Phase 1 for a page range with its own document handles; queue indices are chunk-local."""
+    table_services = _open_table_services(pdf_path)
+    queue = {}
+    with fitz.open(pdf_path) as doc:
+        ops_by_page = {p: _collect_page_ops(doc[p], p, queue, pdf_path, table_services) for p in pages}
+    if table_services: table_services[2].close()
+    return ops_by_page, queue
+
+def _enqueue(queue: dict, text: str) -> int:
+    """Queue index of `text`, adding it on first sight; repeats share one slot."""
+    return queue.setdefault(text, len(queue))
+
+def _remap_queue_indices(ops: dict, mapping: list) -> None:
+    """Rewrite every queue index referenced by one page's ops through `mapping`, in place."""
+    for t in ops['tables']:
+        if t['type'] == 'maryum_table':
+            t['indices'] = {k: mapping[v] for k, v in t['indices'].items()}
+        else:
+            for c in t['cells']:
+                if c['idx'] is not None: c['idx'] = mapping[c['idx']]
+    tb = ops['text_blocks']
+    tb['idx'] = np.asarray(mapping, dtype=np.intp)[tb['idx']]
+
+def _text_block_arrays(texts: list, bboxes: list, sizes: list, bolds: list, idxs: list, arabic: list) -> dict:
+    """
+    A page's text lines as a struct of arrays (one entry per line): compact to
+    pickle between processes and ready for Phase 3's vectorized box math.
+    """
+    size = np.array(sizes, dtype=np.float64)
+    bold = np.array(bolds, dtype=bool)
+    return {
+        'text': texts,
+        'bbox': np.array(bboxes, dtype=np.float64).reshape(-1, 4),
+        'size': size,
+        'bold': bold,
+        'heading': bold | (size > 14),
+        'idx': np.array(idxs, dtype=np.intp),
+        'arabic': np.array(arabic, dtype=bool),
+    }
+
+def _collect_page_ops(page, page_num: int, global_queue: dict, pdf_path: str, table_services) -> dict:
+    """
+    Phase 1 for one page: find tables and text lines, queue their text for
+    translation and return the page's ops (referencing queue indices).
+    """
+    ops = {'tables': [], 'text_blocks': _text_block_arrays([], [], [], [], [], []), 'arabic_spans': np.zeros((0, 4))}
+    table_exclusion = []
+    
+    # Image-only pages (scans the OCR pass left empty) have nothing to
+    # translate: skip table detection here and all of Phase 3
+    text_blocks = [b for b in page.get_text("dict", flags=_TEXT_DICT_FLAGS)["blocks"] if "lines" in b]
+    if not any(s["text"].strip() for b in text_blocks for l in b["lines"] for s in l["spans"]):
+        return ops
+
+    # Every Arabic span on the page, tables included, for Phase 3's security
+    # sweep; Phase 3 sees the same page content, so it need not re-extract it
+    ops['arabic_spans'] = np.array([s["bbox"] for b in text_blocks for l in b["lines"] for s in l["spans"]
+                                    if _ARABIC_RE.search(s["text"])], dtype=np.float64).reshape(-1, 4)
+    
+    if table_services:
+        maryum_detector, maryum_extractor, plumber_pdf = table_services
+        try:
+            m_configs = maryum_detector.detect_tables_on_page(pdf_path, page_num, plumber_pdf)
+            if m_configs:
+                extracted = maryum_extractor.extract_tables(pdf_path, m_configs, None, f"p{page_num}", plumber_pdf)
+                if extracted:
+                    for orig_csv, layout in extracted:
+                        try:
+                            df = pd.read_csv(orig_csv, header=None).fillna("")
+                            if df.empty or not layout: continue
+                            bbox = (min(c.x0 for r in layout for c in r), min(c.y0 for r in layout for c in r),
+                                    max(c.x1 for r in layout for c in r), max(c.y1 for r in layout for c in r))
+                            table_exclusion.append(bbox)
+                            # Plain string rows: cheap to pickle back from Phase 1 workers
+                            rows = df.astype(str).values.tolist()
+                            t_item = {"type": "maryum_table", "rows": rows, "layout": layout, "rect": bbox, "indices": {}}
+                            for r_idx, row in enumerate(rows):
+                                for c_idx, val in enumerate(row):
+                                    val_s = val.strip()
+                                    if val_s:
+                                        # Always collect for table cells to ensure full Excel
+                                        t_item['indices'][f"{r_idx},{c_idx}"] = _enqueue(global_queue, normalize_arabic_numerals(val_s))
+                            ops['tables'].append(t_item)
+                        except: pass
+        except: pass
+    
+    if not ops['tables']:
+        try:
+            for table in page.find_tables():
+                table_exclusion.append(tuple(table.bbox))
+                lt = {"type": "legacy", "bbox": tuple(table.bbox), "cells": []}
+                # Merged cells come back as None
+                cells = [tuple(cell) for row in table.rows for cell in row.cells if cell is not None]
+                for cell, txt in zip(cells, _cell_texts(text_blocks, cells)):
+                    c_data = {"rect": cell, "text": txt, "idx": None}
+                    if txt:
+                        c_data["idx"] = _enqueue(global_queue, normalize_arabic_numerals(txt))
+                    lt["cells"].append(c_data)
+                ops['tables'].append(lt)
+        except: pass
+
+    if table_exclusion:
+        keep = _outside_rects(np.array([b["bbox"] for b in text_blocks], dtype=np.float64),
+                              np.array(table_exclusion, dtype=np.float64))
+        text_blocks = [b for b, k in zip(text_blocks, keep) if k]
+
+    texts, bboxes, sizes, bolds, idxs, arabic = [], [], [], [], [], []
+    for block in text_blocks:
+        
+        for line in block["lines"]:
+            # One pass over the spans for text, boldness and the largest size
+            parts, max_size, is_bold = [], 0, False
+            for s in line["spans"]:
+                span_text = s["text"].strip()
+                if span_text: parts.append(span_text)
+                if s.get("flags", 0) & 16: is_bold = True
+                max_size = max(max_size, s.get("size", 10))
+            if not parts: continue
+            line_text = " ".join(parts)
+            
+            texts.append(line_text)
+            bboxes.append(line["bbox"])
+            sizes.append(max_size)
+            bolds.append(is_bold)
+            idxs.append(_enqueue(global_queue, normalize_arabic_numerals(line_text)))
+            arabic.append(bool(_ARABIC_RE.search(line_text)))
+    ops['text_blocks'] = _text_block_arrays(texts, bboxes, sizes, bolds, idxs, arabic)
+    return ops
+
+def _translate_queue(global_queue: dict) -> list:
+    """Phase 2: translate the (already distinct) queued segments; results align with queue indices."""
+    # Segments without Arabic letters (numbers, Latin labels, bullets) pass through
+    # t_map.get unchanged; if none remain the translation model is never loaded
+    # Queue order is already deterministic, and translate_batch length-sorts for batching itself
+    unique = [t for t in global_queue if _ARABIC_RE.search(t)]
+    # Imported here, in the parent only: the spawned Phase 1 workers import this
+    # module and must not pull in torch/transformers and the translation model
+    from services.translate_service import translate_batch
+    t_map = dict(zip(unique, translate_batch(unique, batch_size=32))) if unique else {}
+    return [t_map.get(t, t) for t in global_queue]
+
+def _save_replacing(doc, output_path: str) -> None:
+    """Full save to a sibling temp file swapped over output_path (which `doc` may still have open)."""
+    fd, tmp_path = tempfile.mkstemp(suffix='.pdf', dir=os.path.dirname(os.path.abspath(output_path))); os.close(fd)
+    try:
+        # Object streams pack the many small per-page text/font objects compactly
+        doc.save(tmp_path, garbage=3, deflate=True, use_objstms=1)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path): os.unlink(tmp_path)
+        raise
+
+def _cell_texts(text_blocks: list, cells: list) -> list:
+    """
+    Text of each (x0, y0, x1, y1) cell, assembled from the page's already
+    extracted spans by center point rather than a clipped re-extraction per cell.
+    Spans are bucketed with a binary search over the table's grid edges; a
+    merged cell owns every grid slot it covers.
+    """
+    spans = [(s, li) for li, line in enumerate(l for b in text_blocks for l in b["lines"]) for s in line["spans"]]
+    if not spans or not cells: return [""] * len(cells)
+    c = np.array(cells, dtype=np.float64)
+    xs, ys = np.unique(c[:, [0, 2]]), np.unique(c[:, [1, 3]])
+    grid = np.full((len(ys) - 1, len(xs) - 1), -1)
+    for k, (x0, y0, x1, y1) in enumerate(c):
+        grid[ys.searchsorted(y0):ys.searchsorted(y1), xs.searchsorted(x0):xs.searchsorted(x1)] = k
+    boxes = np.array([s["bbox"] for s, _ in spans], dtype=np.float64)
+    col = xs.searchsorted((boxes[:, 0] + boxes[:, 2]) / 2, side="right") - 1
+    row = ys.searchsorted((boxes[:, 1] + boxes[:, 3]) / 2, side="right") - 1
+    on_grid = (col >= 0) & (col < grid.shape[1]) & (row >= 0) & (row < grid.shape[0])
+    lines = [{} for _ in cells]
+    for i in np.flatnonzero(on_grid):
+        k = grid[row[i], col[i]]
+        if k < 0: continue
+        span, li = spans[i]
+        lines[k].setdefault(li, []).append(span["text"])
+    return ["\n".join("".join(parts) for parts in cell_lines.values()).strip() for cell_lines in lines]
+
+def _outside_rects(boxes: np.ndarray, exclusion: np.ndarray) -> np.ndarray:
+    """
+    Mask of the (N, 4) boxes that intersect none of the (M, 4) exclusion rects,
+    with fitz.Rect.intersects semantics (empty rects never intersect).
+    """
+    b = boxes[:, None, :]
+    e = exclusion[None, :, :]
+    hit = ((b[..., 0] < e[..., 2]) & (e[..., 0] < b[..., 2]) &
+           (b[..., 1] < e[..., 3]) & (e[..., 1] < b[..., 3]))
+    b_ok = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    e_ok = (exclusion[:, 2] > exclusion[:, 0]) & (exclusion[:, 3] > exclusion[:, 1])
+    return ~(hit & b_ok[:, None] & e_ok[None, :]).any(axis=1)
+
+def _touching_rects(boxes: np.ndarray, rects: np.ndarray) -> np.ndarray:
+    """Mask of the non-empty (N, 4) boxes that overlap or share an edge with any non-empty (M, 4) rect."""
+    b = boxes[:, None, :]
+    r = rects[None, :, :]
+    hit = ((b[..., 0] <= r[..., 2]) & (r[..., 0] <= b[..., 2]) &
+           (b[..., 1] <= r[..., 3]) & (r[..., 1] <= b[..., 3]))
+    b_ok = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    r_ok = (rects[:, 2] > rects[:, 0]) & (rects[:, 3] > rects[:, 1])
+    return (hit & b_ok[:, None] & r_ok[None, :]).any(axis=1)
+
+def _render_page_ops(page, page_num: int, ops: dict, results, stats: dict) -> bool:
+    """
+    Redact the original segments of one page and draw their translations.
+    Returns whether anything was redacted.
+    """
+    # Phase 1 leaves ops empty only for pages without any text, so there is
+    # nothing to redact, sweep or draw
+    tb = ops['text_blocks']
+    if not ops['tables'] and not tb['text']:
+        return False
+    # Lines without Arabic (Latin text, Western numbers) translate to themselves:
+    # their original glyphs stay, instead of being redacted and redrawn
+    redraw = tb['arabic'].copy()
+    table_rects = []
+    for t in ops['tables']:
+        t_bbox = t.get('rect') or t.get('bbox')
+        if t_bbox:
+            table_rects.append(fitz.Rect(t_bbox))
+    # ...unless a white cover would paint over part of them: a kept line that
+    # overlaps or touches a cover is redacted and redrawn too, and its own cover
+    # may in turn reach further kept lines
+    new_covers = np.vstack([tb['bbox'][redraw], np.array([tuple(r) for r in table_rects]).reshape(-1, 4),
+                            ops['arabic_spans']])
+    while len(new_covers):
+        hit = ~redraw & _touching_rects(tb['bbox'], new_covers)
+        redraw |= hit
+        new_covers = tb['bbox'][hit]
+    # 1. Redact all segments. Redactions only remove the text; the white covers
+    # are painted afterwards as one batched fill in the page's single shape
+    cover_rects = [fitz.Rect(r) for r in tb['bbox'][redraw].tolist()] + table_rects
+    redraw = redraw.tolist()
+    
+    # Security sweep for any remaining Arabic artifacts
+    cover_rects.extend(fitz.Rect(r) for r in ops['arabic_spans'].tolist())
+    
+    # Glyph-level removal only: the white covers below hide whatever lies
+    # underneath, so scanned page images need not be decoded and rewritten,
+    # nor table rules and other line art clipped out of the content stream
+    for r in cover_rects:
+        page.add_redact_annot(r, fill=False)
+    if cover_rects:
+        page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_LINE_ART_NONE)
+    
+    # 2. Render with Standard Fonts (guarantees visibility)
+    f_regular = "helv"
+    f_bold = "hebo" # Helvetica-Bold in PyMuPDF
+    # One shape per page: page.insert_textbox builds and commits a fresh
+    # content stream (plus wrap_contents) on every call. Its drawings are
+    # emitted before its text, so the covers land underneath the translations
+    shape = page.new_shape()
+    for r in cover_rects:
+        shape.draw_rect(r)
+    shape.finish(color=None, fill=(1,1,1), width=0)
+
+    # Tables
+    for t in ops['tables']:
+        if t['type'] == 'maryum_table':
+            for r_idx, row in enumerate(t['rows']):
+                for c_idx, val in enumerate(row):
+                    q_idx = t['indices'].get(f"{r_idx},{c_idx}")
+                    if q_idx is None: continue
+                    txt = results[q_idx]
+                    if not txt or _ARABIC_RE.search(txt):
+                        txt = _ARABIC_RE.sub('', txt or "").strip() or normalize_arabic_numerals(val)
+                    layout = t['layout'][r_idx][c_idx]
+                    _insert_fitted_text(shape, fitz.Rect(layout.x0, layout.y0, layout.x1, layout.y1), txt, 8, f_regular)
+                    stats['segments'].append({'page': page_num+1, 'type': 'table_cell', 'original': val, 'translated': txt})
+                    stats['full_translated_text'].append(txt)
+                    stats['full_original_text'].append(val)
+        else:
+            for c in t['cells']:
+                if c['idx'] is None: continue
+                txt = results[c['idx']]
+                if not txt or _ARABIC_RE.search(txt):
+                    txt = _ARABIC_RE.sub('', txt or "").strip() or normalize_arabic_numerals(c['text'])
+                _insert_fitted_text(shape, fitz.Rect(c['rect']), txt, 8, f_regular)
+                stats['segments'].append({'page': page_num+1, 'type': 'legacy_table_cell', 'original': c['text'], 'translated': txt})
+                stats['full_translated_text'].append(txt)
+                stats['full_original_text'].append(c['text'])
+
+    # Blocks: the page's box geometry is computed as array ops up front
+    boxes = tb['bbox'].copy()
+    sizes = tb['size'] * 0.8
+    heights = boxes[:, 3] - boxes[:, 1]
+    # Fidelity Fix: Slightly smaller font + larger box to ensure visibility
+    boxes[:, 3] += heights * 0.3 # Allow more height for wrapping
+    boxes[:, 2] += 5 # Slight width buffer
+    # insert_textbox raises on empty boxes (zero-height lines) and zero font sizes
+    drawable = ((boxes[:, 2] > boxes[:, 0]) & (heights > 0) & (sizes > 0)).tolist()
+    headings = tb['heading'].tolist()
+    for i, (orig_txt, q_idx, box, size) in enumerate(zip(tb['text'], tb['idx'].tolist(), boxes.tolist(), sizes.tolist())):
+        txt = results[q_idx]
+        if not txt or _ARABIC_RE.search(txt):
+            txt = _ARABIC_RE.sub('', txt or "").strip() or normalize_arabic_numerals(orig_txt)
+        
+        if redraw[i] and drawable[i]:
+            # Headings include every bold line
+            font = f_bold if headings[i] else f_regular
+            _insert_fitted_text(shape, fitz.Rect(box), txt, size, font, align=fitz.TEXT_ALIGN_LEFT)
+        
+        stats['full_translated_text'].append(txt)
+        stats['full_original_text'].append(orig_txt)
+        stats['text_blocks_translated'] += 1
+        stats['segments'].append({'page': page_num+1, 'type': 'heading' if headings[i] else 'body', 'original': orig_txt, 'translated': txt})
+
+    shape.commit()
+    return bool(cover_rects)
+
+def _wrapped_height(paras: list, space: float, line_height: float, width: float) -> float:
+    """Height (in 1pt units) of greedily word-wrapped text at a 1pt line width of `width`."""
+    lines = 0
+    for words in paras:
+        lines += 1
+        cur = None
+        for w in words:
+            if cur is None: cur = w
+            elif cur + space + w <= width: cur += space + w
+            else: lines, cur = lines + 1, w
+            if cur > width:
+                # Over-long words are broken across lines by insert_textbox
+                extra = int(cur // width)
+                lines, cur = lines + extra, cur - extra * width
+    return lines * line_height
+
+def _fit_font_size(txt: str, rect, fontname: str, max_size: float) -> float:
+    """
+    Largest size in [MIN_FONT_SIZE, max_size] at which the word-wrapped text fits
+    the box, found by binary search over a dry-run layout (nothing is drawn).
+    """
+    if rect.width <= 0 or rect.height <= 0 or max_size <= MIN_FONT_SIZE: return max_size
+    font = _FONTS[fontname]
+    space = font.text_length(" ", fontsize=1)
+    line_height = font.ascender - font.descender
+    paras = [[font.text_length(w, fontsize=1) for w in line.split()] for line in txt.split("\n")]
+    def fits(size: float) -> bool:
+        return _wrapped_height(paras, space, line_height, rect.width / size) * size <= rect.height
+    if fits(max_size): return max_size
+    lo, hi = MIN_FONT_SIZE, max_size
+    while hi - lo > 0.25:
+        mid = (lo + hi) / 2
+        if fits(mid): lo = mid
+        else: hi = mid
+    return lo
+
+def _insert_fitted_text(shape, rect, txt: str, max_size: float, fontname: str, **kwargs) -> None:
+    """
+    Insert text at the binary-searched fitted size; insert_textbox writes nothing
+    when the text overflows, so layout mismatches get one retry at half size.
+    """
+    size = _fit_font_size(txt, rect, fontname, max_size)
+    if shape.insert_textbox(rect, txt, fontsize=size, fontname=fontname, **kwargs) < 0 and size > MIN_FONT_SIZE:
+        shape.insert_textbox(rect, txt, fontsize=max(MIN_FONT_SIZE, size / 2), fontname=fontname, **kwargs)
+
+def _page_chunks(window: range) -> list:
+    """Split a page window into the contiguous ranges handed to one worker each."""
+    return [range(start, min(start + COLLECT_PAGES_PER_WORKER, window.stop))
+            for start in range(window.start, window.stop, COLLECT_PAGES_PER_WORKER)]
 
 def translate_pdf_with_layout(pdf_path, output_path): return translate_pdf_inplace(pdf_path, output_path)
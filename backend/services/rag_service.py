@@ -1,6 +1,7 @@
 import os
-import uuid
+import hashlib
 from typing import List, Dict, Any, Optional
+import torch
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import ollama
@@ -10,22 +11,40 @@ from sentence_transformers import SentenceTransformer
 # Configuration
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+# gRPC ships vectors as packed protobuf floats instead of JSON arrays; opt-in,
+# since it needs the gRPC port reachable as well as the REST one
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
 # Models
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+# Documents with at least this many chunks are encoded on all GPUs at once
+MULTI_GPU_MIN_CHUNKS = 512
 CHAT_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b-instruct-q4_k_m")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434") 
 
 COLLECTION_NAME = "OCR-APPLICATION-V2" 
 
+# INT8 copies of the vectors are searched in RAM (originals rescore the top hits),
+# a quarter of the FP32 index footprint; chunk text payloads live on disk
+VECTOR_QUANTIZATION = models.ScalarQuantization(
+    scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+
+def _point_id(doc_id: str, chunk_index: int) -> int:
+    """Deterministic 64-bit point id, so re-indexing a document overwrites its chunks."""
+    return int.from_bytes(hashlib.blake2b(f"{doc_id}:{chunk_index}".encode(), digest_size=8).digest(), "big")
+
 class RAGService:
     def __init__(self):
         try:
-            self.client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+            self.client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,
+                                       grpc_port=QDRANT_GRPC_PORT, prefer_grpc=QDRANT_PREFER_GRPC)
             
             # Initialize Sentence Transformer (Local Embeddings)
             print(f"Loading embedding model: {EMBEDDING_MODEL_NAME}...")
-            self.encoder = SentenceTransformer(EMBEDDING_MODEL_NAME)
-            print("Embedding model loaded.")
+            self.encoder = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cuda" if torch.cuda.is_available() else "cpu")
+            print(f"Embedding model loaded on {self.encoder.device}.")
 
             self._ensure_collection()
             print(f"Connected to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
@@ -76,14 +95,19 @@ class RAGService:
             return [CHAT_MODEL]  # Return default if failed
 
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
+        """Create collection if it doesn't exist; make sure its vectors are INT8-quantized."""
         if not self.client:
             return
 
         collections = self.client.get_collections()
         exists = any(c.name == COLLECTION_NAME for c in collections.collections)
 
-        if not exists:
+        if exists:
+            # Collections created before quantization was enabled are upgraded in place
+            if self.client.get_collection(COLLECTION_NAME).config.quantization_config is None:
+                self.client.update_collection(collection_name=COLLECTION_NAME, quantization_config=VECTOR_QUANTIZATION)
+                print(f"Enabled scalar quantization on collection: {COLLECTION_NAME}")
+        else:
             # nomadic-embed-text has 768 dimensions
             # llama2/mistral often have 4096. 
             # We'll use 768 for nomic-embed-text.
@@ -96,20 +120,12 @@ class RAGService:
                 vectors_config=models.VectorParams(
                     size=vector_size,
                     distance=models.Distance.COSINE
-                )
+                ),
+                quantization_config=VECTOR_QUANTIZATION,
+                on_disk_payload=True
             )
             print(f"Created collection: {COLLECTION_NAME}")
 
-    def _get_embedding(self, text: str) -> List[float]:
-        """Generate embedding using SentenceTransformer."""
-        try:
-            # Generate embedding
-            embedding = self.encoder.encode(text)
-            return embedding.tolist()
-        except Exception as e:
-            print(f"Error getting embedding: {e}")
-            raise
-
     def index_document(self, doc_id: str, text: str) -> bool:
         """
         Split text into chunks and index into Qdrant.
@@ -121,29 +137,30 @@ class RAGService:
         # Simple splitting by paragraphs or fixed size
         # For simplicity, let's look for double newlines or split by char count
         chunks = self._chunk_text(text)
-        
-        points = []
-        for i, chunk in enumerate(chunks):
-            if not chunk.strip():
-                continue
-            
-            try:
-                vector = self._get_embedding(chunk)
-                
-                payload = {
+        indexed = [(i, chunk) for i, chunk in enumerate(chunks) if chunk.strip()]
+        if not indexed:
+            return False
+
+        # One batched encode: SentenceTransformer pads and runs the chunks
+        # through the model together instead of one forward pass per chunk
+        try:
+            vectors = self._encode_chunks([chunk for _, chunk in indexed])
+        except Exception as e:
+            print(f"Error embedding chunks for document {doc_id}: {e}")
+            return False
+
+        points = [
+            models.PointStruct(
+                id=_point_id(doc_id, i),
+                vector=vector.tolist(),
+                payload={
                     "doc_id": doc_id,
                     "text": chunk,
                     "chunk_index": i
                 }
-                
-                points.append(models.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=vector,
-                    payload=payload
-                ))
-            except Exception as e:
-                print(f"Error embedding chunk {i}: {e}")
-                continue
+            )
+            for (i, chunk), vector in zip(indexed, vectors)
+        ]
 
         if points:
             try:
@@ -151,6 +168,16 @@ class RAGService:
                     collection_name=COLLECTION_NAME,
                     points=points
                 )
+                # A shorter re-index leaves the previous run's tail chunks behind
+                self.client.delete(
+                    collection_name=COLLECTION_NAME,
+                    points_selector=models.Filter(
+                        must=[
+                            models.FieldCondition(key="doc_id", match=models.MatchValue(value=doc_id)),
+                            models.FieldCondition(key="chunk_index", range=models.Range(gte=len(chunks)))
+                        ]
+                    )
+                )
                 print(f"Indexed {len(points)} chunks for document {doc_id}")
                 return True
             except Exception as e:
@@ -159,37 +186,64 @@ class RAGService:
         
         return False
 
+    def _encode_chunks(self, chunks: List[str]):
+        """Embed document chunks, spreading large documents over every GPU when there are several."""
+        if len(chunks) >= MULTI_GPU_MIN_CHUNKS and torch.cuda.device_count() > 1:
+            pool = self.encoder.start_multi_process_pool()
+            try:
+                return self.encoder.encode_multi_process(chunks, pool, batch_size=EMBEDDING_BATCH_SIZE)
+            finally:
+                self.encoder.stop_multi_process_pool(pool)
+        return self.encoder.encode(chunks, batch_size=EMBEDDING_BATCH_SIZE,
+                                   show_progress_bar=False, convert_to_numpy=True)
+
     def chat_with_document(self, doc_id: str, query: str, model_name: Optional[str] = None) -> str:
         """
         RAG flow: Retrieve relevant chunks -> Chat with LLM.
         """
+        return self.chat_with_document_batch(doc_id, [query], model_name)[0]
+
+    def chat_with_document_batch(self, doc_id: str, queries: List[str], model_name: Optional[str] = None) -> List[str]:
+        """
+        RAG flow for several questions about one document: all queries are
+        embedded in one encoder pass and retrieved in one Qdrant round-trip,
+        then each is answered by the LLM. Returns one answer per query.
+        """
         if not self.client:
-            return "Error: Database connection unavailable."
+            return ["Error: Database connection unavailable."] * len(queries)
 
-        # 1. Embed query
+        # 1. Embed queries
         try:
-            query_vector = self._get_embedding(query)
+            query_vectors = self.encoder.encode(queries, batch_size=EMBEDDING_BATCH_SIZE,
+                                                show_progress_bar=False, convert_to_numpy=True).tolist()
         except Exception as e:
-            return f"Error processing query: {str(e)}"
+            return [f"Error processing query: {str(e)}"] * len(queries)
 
         # 2. Search Qdrant
+        doc_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="doc_id",
+                    match=models.MatchValue(value=doc_id)
+                )
+            ]
+        )
         try:
-            search_result = self.client.query_points(
+            responses = self.client.query_batch_points(
                 collection_name=COLLECTION_NAME,
-                query=query_vector,
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="doc_id",
-                            match=models.MatchValue(value=doc_id)
-                        )
-                    ]
-                ),
-                limit=5 
-            ).points
+                requests=[
+                    models.QueryRequest(query=vector, filter=doc_filter, limit=5, with_payload=True)
+                    for vector in query_vectors
+                ]
+            )
         except Exception as e:
-            return f"Error searching document: {str(e)}"
+            return [f"Error searching document: {str(e)}"] * len(queries)
+
+        return [self._answer_from_hits(query, response.points, model_name)
+                for query, response in zip(queries, responses)]
 
+    def _answer_from_hits(self, query: str, search_result: list, model_name: Optional[str]) -> str:
+        """Answer one query with the LLM, grounded in its retrieved chunks."""
         if not search_result:
             return "I couldn't find any relevant information in the document to answer your question."
 
@@ -6,6 +6,8 @@ import pdfplumber
 import tempfile
 import os
 import pandas as pd
+from collections import defaultdict
+from operator import attrgetter
 from typing import List, Dict, Tuple
 from services.layout_extraction_service import TextBlock
 
@@ -37,15 +39,17 @@ class Table:
     def __init__(self, cells: List[TableCell], page_num: int):
         self.cells = cells
         self.page_num = page_num
-        self.num_rows = max(cell.row for cell in cells) + 1 if cells else 0
-        self.num_cols = max(cell.col for cell in cells) + 1 if cells else 0
-        # Compute bounding box from cells
+        # Dimensions and bounding box from one pass over the cells
         if cells:
-            self.x0 = min(c.x0 for c in cells)
-            self.y0 = min(c.y0 for c in cells)
-            self.x1 = max(c.x1 for c in cells)
-            self.y1 = max(c.y1 for c in cells)
+            rows, cols, x0s, y0s, x1s, y1s = zip(*((c.row, c.col, c.x0, c.y0, c.x1, c.y1) for c in cells))
+            self.num_rows = max(rows) + 1
+            self.num_cols = max(cols) + 1
+            self.x0 = min(x0s)
+            self.y0 = min(y0s)
+            self.x1 = max(x1s)
+            self.y1 = max(y1s)
         else:
+            self.num_rows = self.num_cols = 0
             self.x0 = self.y0 = self.x1 = self.y1 = 0.0
 
     def bbox(self) -> Tuple[float, float, float, float]:
@@ -241,10 +245,8 @@ def extract_tables_from_ocr(text_blocks: List[TextBlock]) -> List[Table]:
     This is a fallback when Camelot/pdfplumber fail.
     """
     # Group blocks by page
-    blocks_by_page = {}
+    blocks_by_page = defaultdict(list)
     for block in text_blocks:
-        if block.page_num not in blocks_by_page:
-            blocks_by_page[block.page_num] = []
         blocks_by_page[block.page_num].append(block)
     
     tables = []
@@ -282,28 +284,33 @@ def _detect_table_structure(blocks: List[TextBlock]) -> List[List[TextBlock]]:
         return []
     
     # Sort blocks by y position (top to bottom)
-    sorted_blocks = sorted(blocks, key=lambda b: b.y0)
+    by_x0 = attrgetter('x0')
+    sorted_blocks = sorted(blocks, key=attrgetter('y0'))
     
     # Group into rows based on y-position
     rows = []
     current_row = []
+    current_sum = 0.0  # running sum of y0 over current_row
     y_tolerance = 5
     
     for block in sorted_blocks:
         if not current_row:
             current_row = [block]
+            current_sum = block.y0
         else:
             # Check if block is on same row (similar y0)
-            avg_y = sum(b.y0 for b in current_row) / len(current_row)
+            avg_y = current_sum / len(current_row)
             if abs(block.y0 - avg_y) <= y_tolerance:
                 current_row.append(block)
+                current_sum += block.y0
             else:
                 # New row
-                rows.append(sorted(current_row, key=lambda b: b.x0))  # Sort by x
+                rows.append(sorted(current_row, key=by_x0))  # Sort by x
                 current_row = [block]
+                current_sum = block.y0
     
     if current_row:
-        rows.append(sorted(current_row, key=lambda b: b.x0))
+        rows.append(sorted(current_row, key=by_x0))
     
     # Filter rows that look like tables (multiple columns)
     table_rows = [row for row in rows if len(row) >= 2]
@@ -16,14 +16,19 @@ class PDFExtractionService:
         pdf_path: str, 
         table_configs: List[TableConfig],
         output_dir: str,
-        file_id: str
+        file_id: str,
+        pdf=None
     ) -> List[Tuple[str, List[Any]]]: # Returns list of (csv_path, layout)
-        """Extract all tables and save to CSV"""
+        """Extract all tables and save to CSV; pass an open pdfplumber `pdf` to avoid re-parsing the file"""
         results = []
+        # Tables on the same page share one word extraction
+        page_words = {}
         
         for idx, config in enumerate(table_configs, 1):
             # Extract words in bbox
-            all_words = self.pdf_handler.extract_words_from_page(pdf_path, config.page)
+            if config.page not in page_words:
+                page_words[config.page] = self.pdf_handler.extract_words_from_page(pdf_path, config.page, pdf)
+            all_words = page_words[config.page]
             bbox = config.bbox
             
             words = [
@@ -14,15 +14,20 @@ class PDFHandler:
         return count
     
     @staticmethod
-    def extract_words_from_page(pdf_path: str, page_num: int) -> List[Dict]:
-        """Extract all words from a PDF page"""
+    def extract_words_from_page(pdf_path: str, page_num: int, pdf=None) -> List[Dict]:
+        """Extract all words from a PDF page (reusing `pdf` if already open)"""
+        if pdf is not None:
+            return pdf.pages[page_num].extract_words()
         with pdfplumber.open(pdf_path) as pdf:
             page = pdf.pages[page_num]
             return page.extract_words()
     
     @staticmethod
-    def get_page_dimensions(pdf_path: str, page_num: int) -> tuple:
-        """Get page width and height"""
+    def get_page_dimensions(pdf_path: str, page_num: int, pdf=None) -> tuple:
+        """Get page width and height (reusing `pdf` if already open)"""
+        if pdf is not None:
+            page = pdf.pages[page_num]
+            return page.width, page.height
         with pdfplumber.open(pdf_path) as pdf:
             page = pdf.pages[page_num]
             return page.width, page.height
@@ -1,6 +1,7 @@
 from typing import List
 from collections import defaultdict
 import logging
+import pdfplumber
 
 # Local imports
 from .pdf_handler import PDFHandler
@@ -17,19 +18,18 @@ class TableDetectionService:
     def detect_all_tables(self, pdf_path: str) -> List[TableConfig]:
         """Detect all tables in PDF"""
         all_configs = []
-        page_count = self.pdf_handler.get_page_count(pdf_path)
-        
-        for page_num in range(page_count):
-            page_configs = self.detect_tables_on_page(pdf_path, page_num)
-            all_configs.extend(page_configs)
-            logger.info(f"Page {page_num}: Detected {len(page_configs)} tables")
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in range(len(pdf.pages)):
+                page_configs = self.detect_tables_on_page(pdf_path, page_num, pdf)
+                all_configs.extend(page_configs)
+                logger.info(f"Page {page_num}: Detected {len(page_configs)} tables")
         
         return all_configs
     
-    def detect_tables_on_page(self, pdf_path: str, page_num: int) -> List[TableConfig]:
-        """Detect tables on a specific page"""
-        words = self.pdf_handler.extract_words_from_page(pdf_path, page_num)
-        pdf_w, pdf_h = self.pdf_handler.get_page_dimensions(pdf_path, page_num)
+    def detect_tables_on_page(self, pdf_path: str, page_num: int, pdf=None) -> List[TableConfig]:
+        """Detect tables on a specific page; pass an open pdfplumber `pdf` to avoid re-parsing the file"""
+        words = self.pdf_handler.extract_words_from_page(pdf_path, page_num, pdf)
+        pdf_w, pdf_h = self.pdf_handler.get_page_dimensions(pdf_path, page_num, pdf)
         
         # Step 1: Detect table regions
         table_regions = self._detect_table_regions(words, pdf_h)
@@ -1,3 +1,4 @@
+from bisect import bisect_left
 from typing import List, Dict, Tuple, Optional
 import pandas as pd
 from .models import BoundingBox
@@ -69,18 +70,20 @@ class TableHandler:
         for r_idx, row_words in enumerate(rows):
             col_tokens = [[] for _ in range(n_cols)]
             
-            # Distribute words into columns
-            for w in row_words:
+            # Distribute words into columns; the row is sorted by x once, so each
+            # column's tokens arrive left to right and need no per-cell sort
+            for w in sorted(row_words, key=lambda w: w["x0"] + w["x1"]):
                 x_center = (w["x0"] + w["x1"]) / 2
-                for i in range(n_cols):
-                    if col_bounds[i] <= x_center <= col_bounds[i + 1]:
-                        col_tokens[i].append({
-                            "text": w["text"].strip(), 
-                            "x": x_center,
-                            "x0": w["x0"],
-                            "x1": w["x1"]
-                        })
-                        break
+                if n_cols < 1 or not col_bounds[0] <= x_center <= col_bounds[-1]:
+                    continue
+                # A center on a shared boundary belongs to the left column
+                i = max(bisect_left(col_bounds, x_center) - 1, 0)
+                col_tokens[i].append({
+                    "text": w["text"].strip(), 
+                    "x": x_center,
+                    "x0": w["x0"],
+                    "x1": w["x1"]
+                })
             
             # Build cell text with RTL handling
             row_text = []
@@ -101,8 +104,8 @@ class TableHandler:
                     continue
                 
                 rtl = any(has_arabic_letter(t["text"]) for t in toks)
-                # Sort tokens visually from Right to Left if RTL
-                toks_sorted = sorted(toks, key=lambda t: t["x"], reverse=rtl)
+                # Order tokens visually from Right to Left if RTL
+                toks_sorted = toks[::-1] if rtl else toks
                 
                 parts = []
                 for idx, t in enumerate(toks_sorted):
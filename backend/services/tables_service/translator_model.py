@@ -3,6 +3,7 @@ import torch
 from typing import List, Dict
 import re
 import logging
+from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
@@ -62,8 +63,9 @@ class TranslatorModel:
             return []
         
         results = [""] * len(texts)
-        uncached_indices = []
-        uncached_texts = []
+        # Each distinct uncached string is translated once, then fanned out to
+        # every position it occupies (repeated headers/labels are common)
+        uncached_indices = defaultdict(list)
         
         # Check cache first
         for i, text in enumerate(texts):
@@ -74,14 +76,15 @@ class TranslatorModel:
             if text in self.cache:
                 results[i] = self.cache[text]
             else:
-                uncached_indices.append(i)
-                uncached_texts.append(text)
+                uncached_indices[text].append(i)
         
+        uncached_texts = list(uncached_indices)
         if not uncached_texts:
             logger.info("All strings found in cache!")
             return results
         
-        logger.info(f"Translating {len(uncached_texts)} new strings (cached: {len(texts) - len(uncached_texts)})...")
+        n_uncached = sum(len(v) for v in uncached_indices.values())
+        logger.info(f"Translating {len(uncached_texts)} new strings for {n_uncached} cells (cached: {len(texts) - n_uncached})...")
         
         # Batch translate uncached strings
         translated_segments = []
@@ -157,8 +160,9 @@ class TranslatorModel:
                     translated_segments[retry_indices[i + j]] = decoded
         
         # Update cache and results
-        for idx, original, translated in zip(uncached_indices, uncached_texts, translated_segments):
+        for original, translated in zip(uncached_texts, translated_segments):
             self.cache[original] = translated
-            results[idx] = translated
+            for idx in uncached_indices[original]:
+                results[idx] = translated
         
         return results
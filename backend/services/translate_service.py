@@ -1,16 +1,44 @@
 from transformers import MarianMTModel, MarianTokenizer
 import torch
+import re
+import functools
+import threading
+from collections import OrderedDict
+from services import translation_cache
+
+# Sentences per generate() call in translate_to_english
+SENTENCE_BATCH_SIZE = 16
+
+# Translated segments are kept in an LRU so headers, labels and footers that repeat
+# within and across documents are only sent through the model once
+SEGMENT_CACHE_SIZE = 8192
+_segment_cache = OrderedDict()
+_segment_cache_lock = threading.Lock()
+
+# Whole-text results of translate_to_english kept in memory (keyed on normalized text)
+TRANSLATION_CACHE_SIZE = 4096
+_SPACE_RUN_RE = re.compile(r'[ \t]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
 
 # Global variables to cache the model and tokenizer
 _model = None
 _tokenizer = None
 _device = None
+# Requests translate from several threadpool threads; only one of them loads the model
+_model_lock = threading.Lock()
 
 def get_translation_model():
     """Load and cache the translation model - using better model for accuracy"""
     global _model, _tokenizer, _device
     
-    if _model is None or _tokenizer is None:
+    if _model is not None and _tokenizer is not None:
+        return _model, _tokenizer
+    
+    with _model_lock:
+        # Another thread may have finished loading while this one waited
+        if _model is not None and _tokenizer is not None:
+            return _model, _tokenizer
+        
         # Try better model first, fallback to original if it fails
         model_options = [
             "Helsinki-NLP/opus-mt-tc-big-ar-en",  # Bigger, more accurate model
@@ -20,14 +48,17 @@ def get_translation_model():
         for model_name in model_options:
             try:
                 print(f"Loading translation model: {model_name}")
-                _tokenizer = MarianTokenizer.from_pretrained(model_name)
-                _model = MarianMTModel.from_pretrained(model_name)
+                tokenizer = MarianTokenizer.from_pretrained(model_name)
+                model = MarianMTModel.from_pretrained(model_name)
                 
                 # Set model to evaluation mode
-                _model.eval()
-                _device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                _model.to(_device)
+                model.eval()
+                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                model.to(device)
                 
+                # Published only once fully loaded, so the unlocked check above
+                # never hands out a model that is still being moved to the device
+                _tokenizer, _device, _model = tokenizer, device, model
                 print(f"Translation model loaded successfully: {model_name}")
                 break
             except Exception as e:
@@ -47,35 +78,55 @@ def translate_to_english(arabic_text: str) -> str:
         return ""
 
     # Check if input actually contains Arabic - if not, might already be English
-    import re
-    arabic_pattern = re.compile(r'[\u0600-\u06FF]')
-    if not arabic_pattern.search(arabic_text):
-        # No Arabic found - might already be English or numeric
-        # Return as-is if it looks like valid text
-        if re.search(r'[a-zA-Z]', arabic_text):
-            return arabic_text.strip()
-        # Otherwise, it's probably numeric/symbols, return as-is
+    if not _ARABIC_RE.search(arabic_text):
+        # No Arabic found - might already be English or numeric; return as-is
         return arabic_text.strip()
     
-    model, tokenizer = get_translation_model()
-    
-    # Clean and normalize the input text
+    # Clean and normalize the input text before the cache lookup, so copies of a
+    # string that differ only in spacing share one entry
+    # Preserve line breaks - they might be important for structure
     text = arabic_text.strip()
+    text = _SPACE_RUN_RE.sub(' ', text)  # Multiple spaces to single
+    text = _BLANK_LINES_RE.sub('\n\n', text)  # Normalize paragraph breaks
+    try:
+        return _translate_normalized(text)
+    except _IncompleteTranslation as e:
+        return e.result
+
+class _IncompleteTranslation(Exception):
+    """
+    Carries an empty or partial translation out of _translate_normalized:
+    raising keeps it out of both the lru_cache and the persistent cache,
+    so the text is translated again next time.
+    """
+    def __init__(self, result: str):
+        super().__init__(result)
+        self.result = result
+
+@functools.lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def _translate_normalized(text: str) -> str:
+    """
+    translate_to_english for Arabic text already run through its whitespace normalization.
+    Raises _IncompleteTranslation if any sentence failed to translate.
+    """
+    cached = translation_cache.get(text)
+    if cached is not None:
+        return cached
     
-    # Preserve line breaks - they might be important for structure
-    # Replace multiple spaces with single space, but keep line breaks
-    text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces to single
-    text = re.sub(r'\n\s*\n', '\n\n', text)  # Normalize paragraph breaks
+    model, tokenizer = get_translation_model()
     
     # Split into sentences more carefully
     # Arabic sentence endings: . ! ? ؟ ؛
     # But preserve line structure for paragraphs
     lines = text.split('\n')
-    translated_lines = []
     
+    # First pass: split every line into sentences and collect the ones that need
+    # the model, so they can be translated in batched generate() calls
+    line_sentences = []
+    pending = []
     for line in lines:
         if not line.strip():
-            translated_lines.append("")
+            line_sentences.append(None)
             continue
         
         # Split line into sentences
@@ -94,38 +145,57 @@ def translate_to_english(arabic_text: str) -> str:
         if not sentence_pairs:
             sentence_pairs = [(line.strip(), "")]
         
-        # Translate each sentence individually for better accuracy
+        for sentence, _ in sentence_pairs:
+            if sentence.strip() and _ARABIC_RE.search(sentence):
+                pending.append(sentence)
+        line_sentences.append(sentence_pairs)
+    
+    translations = dict(zip(pending, _translate_sentences(pending, model, tokenizer)))
+    
+    # Second pass: validate and reassemble in the original order
+    translated_lines = []
+    failed = False
+    for sentence_pairs in line_sentences:
+        if sentence_pairs is None:
+            translated_lines.append("")
+            continue
+        
         line_translated_parts = []
         for sentence, punct in sentence_pairs:
             if not sentence.strip():
                 continue
             
             # Skip if no Arabic
-            if not arabic_pattern.search(sentence):
+            if not _ARABIC_RE.search(sentence):
                 line_translated_parts.append(sentence + punct)
                 continue
             
-            # Translate sentence
+            # Translated sentence (from the batch)
             try:
-                translated = _translate_batch(sentence, model, tokenizer)
+                translated = translations[sentence]
                 
                 if translated and translated.strip():
                     # Validate translation
-                    if arabic_pattern.search(translated):
+                    if _ARABIC_RE.search(translated):
                         # Still has Arabic, retry once
                         translated = _translate_batch(sentence, model, tokenizer)
-                        if arabic_pattern.search(translated):
+                        if _ARABIC_RE.search(translated):
                             print(f"Warning: Failed to translate sentence: {sentence[:50]}...")
+                            failed = True
                             continue
                     
                     # Check for bad translation
                     if _is_bad_translation(translated, sentence):
                         print(f"Warning: Bad translation detected, skipping: {sentence[:50]}...")
+                        failed = True
                         continue
                     
                     line_translated_parts.append(translated.strip() + punct)
+                else:
+                    failed = True
             except Exception as e:
                 print(f"Translation error for sentence: {e}")
+                failed = True
                 continue
         
         if line_translated_parts:
@@ -136,18 +206,37 @@ def translate_to_english(arabic_text: str) -> str:
     result = '\n'.join(translated_lines).strip()
     
     # Final validation
-    if result and arabic_pattern.search(result):
+    if result and _ARABIC_RE.search(result):
         print(f"Warning: Translation result still contains Arabic characters")
+        failed = True
     
+    if failed or not result:
+        raise _IncompleteTranslation(result)
+    translation_cache.put(text, result)
     return result
 
+# Validation patterns, compiled once (checked for every translated segment)
+_REPEATED_WORD_RE = re.compile(r'\b(\w+)\s*,\s*\1\s*,\s*\1', re.IGNORECASE)
+_DIMENSION_RE = re.compile(r'\d+x\d+x\d+', re.IGNORECASE)
+_DIGIT_RUN_RE = re.compile(r'\d+')
+_ALPHA_RE = re.compile(r'[a-zA-Z\u0600-\u06FF]')
+_DIGIT_RE = re.compile(r'\d')
+_SYMBOL_RE = re.compile(r'[^\w\s]')
+_NON_ALNUM_RE = re.compile(r'[^\w\s\u0600-\u06FF]')
+_ARABIC_RE = re.compile(r'[\u0600-\u06FF]')
+# Segments made only of these (Western, Arabic-Indic and Persian digits, number
+# punctuation, whitespace) bypass the model and are converted directly
+_NUMERIC_CHARS = frozenset('0123456789\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669'
+                           '\u06F0\u06F1\u06F2\u06F3\u06F4\u06F5\u06F6\u06F7\u06F8\u06F9'
+                           '.,()-+%[] \t\r\n')
+_DIGIT_MAP = str.maketrans('٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹،٪', '01234567890123456789,%')
+_STOP_WORDS = frozenset(['the', 'a', 'an', 'and', 'or', 'in', 'on', 'at', 'to', 'for', 'of', 'with'])
+
 def _is_bad_translation(translated: str, original: str) -> bool:
     """Detect if translation is clearly wrong/hallucinated"""
     if not translated or not original:
         return True
     
-    import re
-    
     # Check for common hallucination patterns (repetitive nonsense)
     bad_phrases = ['rabbit', 'lick', 'sleeve', 'european union']
     translated_lower = translated.lower()
@@ -165,7 +254,7 @@ def _is_bad_translation(translated: str, original: str) -> bool:
         word_counts = {}
         for word in words:
             # Ignore common words
-            if word not in ['the', 'a', 'an', 'and', 'or', 'in', 'on', 'at', 'to', 'for', 'of', 'with']:
+            if word not in _STOP_WORDS:
                 word_counts[word] = word_counts.get(word, 0) + 1
         if word_counts:
             max_count = max(word_counts.values())
@@ -178,15 +267,15 @@ def _is_bad_translation(translated: str, original: str) -> bool:
         return True
     
     # Check for patterns like "X, X, X" (excessive repetition)
-    if re.search(r'\b(\w+)\s*,\s*\1\s*,\s*\1', translated, re.IGNORECASE):
+    if _REPEATED_WORD_RE.search(translated):
         return True
     
     # Check for numeric hallucinations (e.g., "6x4x6x4", "22 22 22")
-    if re.search(r'\d+x\d+x\d+', translated, re.IGNORECASE):
+    if _DIMENSION_RE.search(translated):
         return True
         
     # Check for excessive number repetition
-    digits = re.findall(r'\d+', translated)
+    digits = _DIGIT_RUN_RE.findall(translated)
     if len(digits) > 3:
         # Check if same digit sequence repeats
         if len(set(digits)) == 1: # All same numbers e.g. "20 20 20 20"
@@ -194,6 +283,58 @@ def _is_bad_translation(translated: str, original: str) -> bool:
         
     return False
 
+def _translate_sentences(sentences: list, model, tokenizer, batch_size: int = SENTENCE_BATCH_SIZE) -> list:
+    """
+    Translate many sentences with batched generate() calls.
+    Each result is validated exactly like _translate_batch (original text on failure).
+    """
+    results = {}
+    # Sort unique sentences by length to minimize padding
+    unique = sorted(set(sentences), key=len)
+    for i in range(0, len(unique), batch_size):
+        batch = unique[i:i + batch_size]
+        try:
+            results.update(zip(batch, _generate_batch(batch, model, tokenizer)))
+        except Exception as e:
+            print(f"Batch translation error: {e}. Translating sentences one by one.")
+            for sentence in batch:
+                results[sentence] = _translate_batch(sentence, model, tokenizer)
+    return [results[s] for s in sentences]
+
+def _generate_batch(batch: list, model, tokenizer) -> list:
+    """Batched equivalent of _translate_batch for non-empty Arabic sentences."""
+    texts = [' '.join(t.split()) for t in batch]
+    inputs = tokenizer(
+        texts,
+        return_tensors="pt",
+        padding=True,
+        truncation=True,
+        max_length=512
+    )
+    if next(model.parameters()).is_cuda:
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_length=512,
+            num_beams=1,
+            early_stopping=True,
+            length_penalty=1.0,
+            no_repeat_ngram_size=3,
+            do_sample=False
+        )
+    decoded = tokenizer.batch_decode(outputs.detach().cpu(), skip_special_tokens=True)
+    
+    results = []
+    for text, translated_text in zip(texts, decoded):
+        result = translated_text.strip()
+        # Same fallbacks as _translate_batch: Arabic leakage or bad translation -> original
+        if (result and _ARABIC_RE.search(result)) or _is_bad_translation(result, text):
+            result = text
+        results.append(result)
+    return results
+
 def _translate_batch(text: str, model, tokenizer) -> str:
     try:
         if not text or not text.strip():
@@ -280,22 +421,21 @@ def _is_translatable(text: str) -> bool:
     if not text or len(text.strip()) == 0:
         return False
         
-    import re
     # If text is very short (<4 chars) and contains mixed types (digits + letters), it's likely noise/codes
     # e.g. "4x4", "5a", "f-5"
     clean = text.strip()
     if len(clean) < 5:
         # Check for mixed alphanumeric
-        has_alpha = bool(re.search(r'[a-zA-Z\u0600-\u06FF]', clean))
-        has_digit = bool(re.search(r'\d', clean))
-        has_symbol = bool(re.search(r'[^\w\s]', clean))
+        has_alpha = _ALPHA_RE.search(clean) is not None
+        has_digit = _DIGIT_RE.search(clean) is not None
+        has_symbol = _SYMBOL_RE.search(clean) is not None
         
         if has_digit and (has_alpha or has_symbol):
             return False
             
     # Check for symbol density (e.g. "- - -", "/ /", "...")
-    # Count non-alphanumeric chars
-    non_alnum = len(re.findall(r'[^\w\s\u0600-\u06FF]', clean))
+    # Count non-alphanumeric chars (without building a match list)
+    non_alnum = sum(1 for _ in _NON_ALNUM_RE.finditer(clean))
     if len(clean) > 0 and (non_alnum / len(clean)) > 0.6:
          return False
          
@@ -309,8 +449,6 @@ def translate_batch(texts: list[str], batch_size: int = 16) -> list[str]:
     if not texts:
         return []
 
-    model, tokenizer = get_translation_model()
-
     # Pre-processing:
     # 1. Identify which texts actually need translation (have Arabic)
     # 2. For those that do, split into sentences/segments if they are long
@@ -339,19 +477,9 @@ def translate_batch(texts: list[str], batch_size: int = 16) -> list[str]:
         # CHECK FOR PURE NUMERIC CONTENT (Bypass model)
         # If text consists only of Arabic/English digits and punctuation, convert directly.
         # This fixes issues where model hallucinates on pure numbers (e.g. 36794 -> 64).
-        clean_for_check = re.sub(r'[ \t\r\n]', '', text)
-        # Match digits (Arabic/English), commas, dots, parens, dashes, percent, extended digits
-        if re.match(r'^[\u0660-\u0669\u06F0-\u06F9\d\.,\(\)\-\+%\[\]]+$', clean_for_check):
+        if _NUMERIC_CHARS.issuperset(text):
             # Convert directly
-            mapping = {
-                '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-                '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
-                '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-                '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
-                '،': ',', '٪': '%'
-            }
-            converted = "".join(mapping.get(c, c) for c in text)
-            operations.append({'type': 'const', 'value': converted})
+            operations.append({'type': 'const', 'value': text.translate(_DIGIT_MAP)})
             # print(f"Directly converted numeric: {text} -> {converted}")
             continue
             
@@ -398,22 +526,31 @@ def translate_batch(texts: list[str], batch_size: int = 16) -> list[str]:
             
         operations.append(text_ops)
 
-    # Now batch translate `flat_segments`
+    # Now batch translate `flat_segments` (each distinct, uncached segment once)
     translated_segments = []
     if flat_segments:
-        # Sort by length to minimize padding overhead
-        indexed_segments = list(enumerate(flat_segments))
-        indexed_segments.sort(key=lambda x: len(x[1]))
-        
-        sorted_texts = [x[1] for x in indexed_segments]
-        original_indices = [x[0] for x in indexed_segments]
-        
-        print(f"Batch translating {len(flat_segments)} segments (sorted by length)...")
-        sorted_results = _translate_chunks(sorted_texts, model, tokenizer, batch_size=batch_size)
+        cached = _get_cached_segments(flat_segments)
+        pending = [seg for seg in cached if cached[seg] is None]
+        if pending:
+            # In-memory misses fall back to the persistent cache before the model
+            on_disk = translation_cache.get_many(pending)
+            if on_disk:
+                cached.update(on_disk)
+                _put_cached_segments(on_disk.items())
+                pending = [seg for seg in pending if seg not in on_disk]
+        if pending:
+            # The model is only loaded when something actually needs it
+            model, tokenizer = get_translation_model()
+            # Sort by length to minimize padding overhead
+            sorted_texts = sorted(pending, key=len)
+            print(f"Batch translating {len(sorted_texts)} segments (sorted by length, "
+                  f"{len(cached) - len(pending)} cached)...")
+            sorted_results = _translate_chunks(sorted_texts, model, tokenizer, batch_size=batch_size)
+            cached.update(zip(sorted_texts, sorted_results))
+            _put_cached_segments(zip(sorted_texts, sorted_results))
+            translation_cache.put_many(zip(sorted_texts, sorted_results))
         
-        # Restore original order
-        result_map = {idx: res for idx, res in zip(original_indices, sorted_results)}
-        translated_segments = [result_map[i] for i in range(len(flat_segments))]
+        translated_segments = [cached[seg] for seg in flat_segments]
 
     # Reconstruct
     results = []
@@ -440,6 +577,29 @@ def translate_batch(texts: list[str], batch_size: int = 16) -> list[str]:
             
     return results
 
+def _get_cached_segments(segments: list) -> dict:
+    """Map each distinct segment to its cached translation, or None on a miss."""
+    found = {}
+    with _segment_cache_lock:
+        for seg in segments:
+            if seg in found:
+                continue
+            value = _segment_cache.get(seg)
+            if value is not None:
+                _segment_cache.move_to_end(seg)
+            found[seg] = value
+    return found
+
+def _put_cached_segments(pairs) -> None:
+    with _segment_cache_lock:
+        for seg, translated in pairs:
+            # Failed batches come back empty; leave those to be retried next time
+            if translated:
+                _segment_cache[seg] = translated
+                _segment_cache.move_to_end(seg)
+        while len(_segment_cache) > SEGMENT_CACHE_SIZE:
+            _segment_cache.popitem(last=False)
+
 def _translate_chunks(chunks, model, tokenizer, batch_size: int = 8):
     results = []
     i = 0
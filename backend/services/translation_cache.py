@@ -0,0 +1,125 @@
+"""
+Persistent translation cache shared across runs and documents.
+Keys are content hashes of the source text, so repeated boilerplate is only
+sent through the model once per machine (until TRANSLATION_CACHE_TTL expires).
+
+Clear it with:  python -m services.translation_cache clear
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bump TRANSLATION_CACHE_VERSION whenever the model or post-processing changes
+TRANSLATION_CACHE_PATH = os.environ.get(
+    "TRANSLATION_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "translation", "translations.sqlite3")
+)
+TRANSLATION_CACHE_VERSION = "1"
+# Entries older than this are ignored and pruned on open (0 keeps them forever)
+TRANSLATION_CACHE_TTL = int(os.environ.get("TRANSLATION_CACHE_TTL", 14 * 24 * 3600))
+_SALT = f"{TRANSLATION_CACHE_VERSION}|ar-en".encode()
+
+# SQLite's default host-parameter limit is 999
+_MAX_VARS = 900
+
+_conn = None
+_conn_lock = threading.Lock()
+
+def text_key(text: str) -> bytes:
+    """Content hash of a source text plus the cache version."""
+    h = hashlib.blake2b(_SALT, digest_size=16)
+    h.update(text.encode("utf-8"))
+    return h.digest()
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Open (once) the cache database; None if it cannot be created."""
+    global _conn
+    if _conn is None:
+        try:
+            os.makedirs(os.path.dirname(TRANSLATION_CACHE_PATH), exist_ok=True)
+            conn = sqlite3.connect(TRANSLATION_CACHE_PATH, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS translations (key BLOB PRIMARY KEY, value TEXT NOT NULL, ts INTEGER NOT NULL DEFAULT 0)")
+            # Databases written before the TTL existed lack the column; their rows count as expired
+            if "ts" not in {row[1] for row in conn.execute("PRAGMA table_info(translations)")}:
+                conn.execute("ALTER TABLE translations ADD COLUMN ts INTEGER NOT NULL DEFAULT 0")
+            if TRANSLATION_CACHE_TTL:
+                with conn:
+                    conn.execute("DELETE FROM translations WHERE ts < ?", (_cutoff(),))
+            _conn = conn
+        except sqlite3.Error as e:
+            print(f"Translation cache unavailable: {e}")
+            return None
+    return _conn
+
+def _cutoff() -> int:
+    """Oldest write time still served; 0 when entries never expire."""
+    return int(time.time()) - TRANSLATION_CACHE_TTL if TRANSLATION_CACHE_TTL else 0
+
+def get(text: str) -> Optional[str]:
+    """Cached translation of `text`, or None on a miss."""
+    return get_many([text]).get(text)
+
+def put(text: str, translation: str) -> None:
+    put_many([(text, translation)])
+
+def get_many(texts: Iterable[str]) -> Dict[str, str]:
+    """Map each cached text to its translation; misses are simply absent."""
+    by_key = {text_key(t): t for t in texts}
+    found = {}
+    keys = list(by_key)
+    with _conn_lock:
+        conn = _connect()
+        if conn is None:
+            return found
+        try:
+            for i in range(0, len(keys), _MAX_VARS):
+                chunk = keys[i:i + _MAX_VARS]
+                rows = conn.execute(
+                    f"SELECT key, value FROM translations WHERE ts >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [_cutoff(), *chunk]
+                )
+                for key, value in rows:
+                    found[by_key[key]] = value
+        except sqlite3.Error as e:
+            print(f"Translation cache read failed: {e}")
+    return found
+
+def put_many(pairs: Iterable[Tuple[str, str]]) -> None:
+    """Store translations; the cache is best-effort, so failures are ignored."""
+    now = int(time.time())
+    rows: List[Tuple[bytes, str, int]] = [(text_key(t), v, now) for t, v in pairs if v]
+    if not rows:
+        return
+    with _conn_lock:
+        conn = _connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO translations (key, value, ts) VALUES (?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            print(f"Translation cache write failed: {e}")
+
+def clear() -> int:
+    """Drop every cached translation; returns how many were removed."""
+    with _conn_lock:
+        conn = _connect()
+        if conn is None:
+            return 0
+        with conn:
+            removed = conn.execute("DELETE FROM translations").rowcount
+        conn.execute("VACUUM")
+    return removed
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manage the persistent translation cache.")
+    parser.add_argument("command", choices=["clear"])
+    args = parser.parse_args()
+    if args.command == "clear":
+        print(f"Removed {clear()} cached translations from {TRANSLATION_CACHE_PATH}")
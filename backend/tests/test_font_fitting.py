@@ -0,0 +1,51 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+# pdf_translation_service pulls in the OCR stack through layout_extraction_service
+pytest.importorskip("pytesseract")
+pytest.importorskip("pdf2image")
+
+from services.pdf_translation_service import MIN_FONT_SIZE, _FONTS, _fit_font_size, _wrapped_height
+
+
+@pytest.mark.parametrize("paras, width, lines", [
+    ([[1, 1, 1]], 10, 1),            # everything on one line
+    ([[1, 1, 1]], 2.5, 2),           # "1 1" fills the line exactly, the third word wraps
+    ([[1, 1, 1]], 1, 3),             # one word per line
+    ([[1], [1], []], 10, 3),         # every paragraph (even an empty one) starts a line
+    ([[5]], 2, 3),                   # an over-long word is broken across lines
+])
+def test_wrapped_height_counts_greedy_lines(paras, width, lines):
+    assert _wrapped_height(paras, 0.5, 1.25, width) == lines * 1.25
+
+
+def _fits(txt, rect, fontname, size):
+    """The layout check _fit_font_size binary-searches over."""
+    font = _FONTS[fontname]
+    paras = [[font.text_length(w, fontsize=1) for w in line.split()] for line in txt.split("\n")]
+    height = _wrapped_height(paras, font.text_length(" ", fontsize=1), font.ascender - font.descender, rect.width / size)
+    return height * size <= rect.height
+
+
+@pytest.mark.parametrize("rect, txt, fontname, max_size", [
+    (fitz.Rect(0, 0, 200, 20), "Total amount due", "helv", 12),
+    (fitz.Rect(0, 0, 60, 40), "Quarterly revenue grew by twelve percent", "helv", 14),
+    (fitz.Rect(0, 0, 120, 30), "Annual Report\nFinancial Statements 2023", "hebo", 16),
+    (fitz.Rect(0, 0, 40, 100), "Supercalifragilisticexpialidocious", "helv", 20),
+])
+def test_fit_font_size_picks_largest_fitting_size(rect, txt, fontname, max_size):
+    size = _fit_font_size(txt, rect, fontname, max_size)
+
+    assert MIN_FONT_SIZE <= size <= max_size
+    assert _fits(txt, rect, fontname, size)
+    if size < max_size:
+        # Within the 0.25pt search resolution of the largest size that fits
+        assert not _fits(txt, rect, fontname, size + 0.25)
+
+
+def test_fit_font_size_keeps_max_size_when_it_fits():
+    assert _fit_font_size("OK", fitz.Rect(0, 0, 300, 50), "helv", 12) == 12
+
+
+def test_fit_font_size_floors_at_min_size():
+    assert _fit_font_size("far too much text for a tiny box " * 5, fitz.Rect(0, 0, 20, 5), "helv", 12) == MIN_FONT_SIZE
@@ -0,0 +1,99 @@
+import sqlite3
+import time
+
+import pytest
+
+from services import translation_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """translation_cache pointed at a fresh database, with its connection reset around the test."""
+    monkeypatch.setattr(translation_cache, "TRANSLATION_CACHE_PATH", str(tmp_path / "translations.sqlite3"))
+    monkeypatch.setattr(translation_cache, "_conn", None)
+    yield translation_cache
+    if translation_cache._conn is not None:
+        translation_cache._conn.close()
+
+
+def test_round_trip(cache):
+    cache.put("مرحبا", "Hello")
+    cache.put_many([("شكرا", "Thanks"), ("نعم", "Yes")])
+
+    assert cache.get("مرحبا") == "Hello"
+    assert cache.get_many(["شكرا", "نعم", "لا"]) == {"شكرا": "Thanks", "نعم": "Yes"}
+    assert cache.get("لا") is None
+
+
+def test_empty_translations_are_not_stored(cache):
+    cache.put_many([("مرحبا", ""), ("شكرا", "Thanks")])
+
+    assert cache.get("مرحبا") is None
+    assert cache.get("شكرا") == "Thanks"
+
+
+def test_expired_entries_are_ignored_and_pruned(cache, monkeypatch):
+    monkeypatch.setattr(cache, "TRANSLATION_CACHE_TTL", 100)
+    now = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: now - 101)
+    cache.put("مرحبا", "Hello")
+    monkeypatch.setattr(cache.time, "time", lambda: now)
+    cache.put("شكرا", "Thanks")
+
+    assert cache.get("مرحبا") is None
+    assert cache.get("شكرا") == "Thanks"
+
+    # Reopening prunes the expired row from the table itself
+    cache._conn.close()
+    monkeypatch.setattr(cache, "_conn", None)
+    cache._connect()
+    assert cache._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] == 1
+
+
+def test_zero_ttl_never_expires(cache, monkeypatch):
+    monkeypatch.setattr(cache, "TRANSLATION_CACHE_TTL", 0)
+    monkeypatch.setattr(cache.time, "time", lambda: 0)
+    cache.put("مرحبا", "Hello")
+    monkeypatch.setattr(cache.time, "time", lambda: 10 ** 10)
+
+    assert cache.get("مرحبا") == "Hello"
+
+
+def _write_old_table(path: str) -> None:
+    """A database in the layout written before the TTL existed (no ts column)."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE translations (key BLOB PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute("INSERT INTO translations (key, value) VALUES (?, ?)",
+                 (translation_cache.text_key("مرحبا"), "Hello"))
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_table_without_ts(cache, monkeypatch):
+    monkeypatch.setattr(cache, "TRANSLATION_CACHE_TTL", 0)
+    _write_old_table(cache.TRANSLATION_CACHE_PATH)
+
+    # Old rows survive the migration and are still served when nothing expires
+    assert cache.get("مرحبا") == "Hello"
+    columns = {row[1] for row in cache._conn.execute("PRAGMA table_info(translations)")}
+    assert "ts" in columns
+
+    cache.put("شكرا", "Thanks")
+    assert cache.get("شكرا") == "Thanks"
+
+
+def test_migrated_rows_count_as_expired(cache, monkeypatch):
+    monkeypatch.setattr(cache, "TRANSLATION_CACHE_TTL", 100)
+    _write_old_table(cache.TRANSLATION_CACHE_PATH)
+
+    assert cache.get("مرحبا") is None
+    cache.put("مرحبا", "Hello again")
+    assert cache.get("مرحبا") == "Hello again"
+
+
+def test_clear(cache):
+    cache.put_many([("مرحبا", "Hello"), ("شكرا", "Thanks")])
+
+    assert cache.clear() == 2
+    assert cache.get_many(["مرحبا", "شكرا"]) == {}
+    assert cache.clear() == 0
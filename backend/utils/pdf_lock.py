@@ -0,0 +1,13 @@
+import threading
+
+# PyMuPDF is not thread-safe: every endpoint runs its PDF work in the threadpool
+# (keeping the event loop free for other requests) but one document at a time
+PDF_LOCK = threading.Lock()
+
+def run_with_pdf_lock(func, *args):
+    """
+    Calls func(*args) while holding PDF_LOCK.
+    Meant to be handed to run_in_threadpool.
+    """
+    with PDF_LOCK:
+        return func(*args)